@@ -0,0 +1,161 @@
+import typing
+
+import numpy as np
+
+import codec
+import core
+
+# First match access lists with router style wildcard masks, where set bits
+# are "don't care" and need not be contiguous. Rules are grouped by wildcard:
+# each distinct wildcard gets a hash table from the masked address to the
+# first rule with that value. A lookup probes the tables in order of the
+# first rule in each and stops once no remaining table can hold an earlier
+# rule, so its cost follows the number of distinct wildcards, not rules.
+# Batch lookups run the same probes on sorted numpy arrays (see lpm).
+
+class Rule(typing.NamedTuple):
+    address: int
+    wildcard: int
+    action: str
+
+    def matches(self, address:int) -> bool:
+        return (address ^ self.address) & ~self.wildcard & core.ALL_ONES == 0
+
+    def __str__(self):
+        if self.wildcard == core.ALL_ONES:
+            return f'{self.action} any'
+        if self.wildcard == 0:
+            return f'{self.action} host {codec.formatAddress(self.address)}'
+        return f'{self.action} {codec.formatAddress(self.address)} {codec.formatAddress(self.wildcard)}'
+
+class AccessList:
+    def __init__(self, rules = (), default = 'deny'):
+        self.default = default # Action when no rule matches, routers end every list with an implicit deny
+        self._rules = []
+        self._tables = {} # Care mask -> {masked address: index of the first rule}
+        self._groups = [] # (first rule index, care mask, table), ordered by first rule
+        self._arrays = None
+
+        for address, wildcard, action in rules:
+            self.append(address, wildcard, action)
+
+    def append(self, address:int, wildcard:int, action:str):
+        if not 0 <= address <= core.ALL_ONES or not 0 <= wildcard <= core.ALL_ONES:
+            raise ValueError('address and wildcard must be 32 bit values')
+
+        care = wildcard ^ core.ALL_ONES
+        index = len(self._rules)
+        self._rules.append(Rule(address & care, wildcard, action))
+
+        table = self._tables.get(care)
+        if table is None:
+            table = self._tables[care] = {}
+            self._groups.append((index, care, table))
+        # A later rule with the same value is shadowed and never matches
+        table.setdefault(address & care, index)
+        self._arrays = None
+
+    def rule(self, index:int) -> Rule:
+        return self._rules[index]
+
+    def matchIndex(self, address:int) -> int:
+        # Index of the first matching rule, -1 when none does
+        best = len(self._rules)
+        for first, care, table in self._groups:
+            if first >= best:
+                break
+            index = table.get(address & care, best)
+            if index < best:
+                best = index
+
+        return best if best < len(self._rules) else -1
+
+    def classify(self, address:int):
+        index = self.matchIndex(address)
+        return self.default if index == -1 else self._rules[index].action
+
+    def matchIndexMany(self, addresses) -> np.ndarray:
+        addresses = np.asarray(addresses, dtype=np.uint32)
+        count = len(self._rules)
+        best = np.full(addresses.size, count, dtype=np.int64)
+
+        # Sorted queries stay sorted after masking, which keeps searchsorted cache friendly
+        order = np.argsort(addresses, axis=None, kind='stable')
+        queries = addresses.ravel()[order]
+
+        for first, care, values, indices in self._sortedArrays():
+            # Only queries whose current match comes after this group's first rule can improve
+            pending = np.flatnonzero(best > first)
+            if not len(pending):
+                break
+
+            masked = queries[pending] & care
+            positions = np.searchsorted(values, masked)
+            np.minimum(positions, len(values) - 1, out=positions)
+            hits = values[positions] == masked
+            candidates = np.where(hits, indices[positions], count)
+            best[pending] = np.minimum(best[pending], candidates)
+
+        result = np.empty(addresses.size, dtype=np.int64)
+        result[order] = np.where(best < count, best, -1)
+        return result.reshape(addresses.shape)
+
+    def classifyMany(self, addresses) -> np.ndarray:
+        indices = self.matchIndexMany(addresses)
+        actions = np.empty(len(self._rules) + 1, dtype=object)
+        actions[:-1] = [rule.action for rule in self._rules]
+        actions[-1] = self.default
+        return actions[indices] # -1 picks the default
+
+    def hitCounts(self, addresses) -> np.ndarray:
+        # Matches per rule plus the default as the last entry, rules that stay at zero over a flow log are candidates for removal
+        indices = self.matchIndexMany(addresses).ravel()
+        return np.bincount(np.where(indices < 0, len(self._rules), indices), minlength=len(self._rules) + 1)
+
+    def _sortedArrays(self) -> []:
+        if self._arrays is None:
+            self._arrays = []
+            for first, care, table in self._groups:
+                values = np.fromiter(table.keys(), dtype=np.uint32, count=len(table))
+                indices = np.fromiter(table.values(), dtype=np.int64, count=len(table))
+
+                order = np.argsort(values, kind='stable')
+                self._arrays.append((first, np.uint32(care), values[order], indices[order]))
+
+        return self._arrays
+
+    def __len__(self):
+        return len(self._rules)
+
+    def __iter__(self):
+        return iter(self._rules)
+
+def _parseAddress(text:str, lineNumber:int) -> int:
+    value = codec.parseAddress(text.encode('ascii', 'replace'))
+    if value == -1:
+        raise ValueError(f'line {lineNumber}: {text!r} is not a valid address')
+    return value
+
+def parseRules(lines) -> []:
+    # "action address [wildcard]", "action host address" or "action any" per
+    # line. Blank lines and # or ! comments are ignored.
+    rules = []
+    for lineNumber, line in enumerate(lines, 1):
+        line = line.split('#', 1)[0].split('!', 1)[0].strip()
+        if not line:
+            continue
+
+        fields = line.split()
+        action = fields[0]
+        if fields[1:] == ['any']:
+            rules.append(Rule(0, core.ALL_ONES, action))
+        elif len(fields) == 3 and fields[1] == 'host':
+            rules.append(Rule(_parseAddress(fields[2], lineNumber), 0, action))
+        elif len(fields) in (2, 3):
+            address = _parseAddress(fields[1], lineNumber)
+            wildcard = _parseAddress(fields[2], lineNumber) if len(fields) == 3 else 0
+            rules.append(Rule(address & ~wildcard & core.ALL_ONES, wildcard, action))
+        else:
+            raise ValueError(f'line {lineNumber}: expected "action address [wildcard]"')
+
+    return rules
@@ -0,0 +1,209 @@
+import bisect
+
+import core
+
+# Sets of IPv4 addresses stored as sorted, non-overlapping, non-adjacent
+# inclusive intervals of packed addresses. Set operations merge the interval
+# lists in linear time, so building a set is the only O(n log n) step.
+
+def rangeToNetworks(start:int, end:int) -> []:
+    networks = []
+    while start <= end:
+        alignedBits = (start & -start).bit_length() - 1 if start else 32
+        sizeBits = (end - start + 1).bit_length() - 1
+        hostBits = min(alignedBits, sizeBits)
+
+        networks.append((start, 32 - hostBits))
+        start += 1 << hostBits
+
+    return networks
+
+def networkToRange(network:int, prefix:int) -> tuple[int, int]:
+    network &= core.PREFIX_MASKS[prefix]
+    return network, network | core.HOST_MASKS[prefix]
+
+def findOverlaps(intervals:[]) -> []:
+    # Pairs of input indices (i, j) where interval j starts inside an earlier
+    # interval i. Every interval that overlaps another appears in some pair.
+    order = sorted(range(len(intervals)), key=lambda i: intervals[i][0])
+    overlaps = []
+    furthest = -1
+    furthestIndex = -1
+
+    for i in order:
+        start, end = intervals[i]
+        if start <= furthest:
+            overlaps.append((furthestIndex, i))
+        if end > furthest:
+            furthest = end
+            furthestIndex = i
+
+    return overlaps
+
+def _normalize(intervals) -> tuple[[], []]:
+    starts = []
+    ends = []
+    for start, end in sorted(intervals):
+        if start > end:
+            raise ValueError(f'interval start {start} is after its end {end}')
+        if start < 0 or end > core.ALL_ONES:
+            raise ValueError(f'interval {start}-{end} is outside the IPv4 address space')
+
+        if ends and start <= ends[-1] + 1:
+            if end > ends[-1]:
+                ends[-1] = end
+        else:
+            starts.append(start)
+            ends.append(end)
+
+    return starts, ends
+
+class AddressSet:
+    __slots__ = ('_starts', '_ends')
+
+    def __init__(self, intervals = ()):
+        self._starts, self._ends = _normalize(intervals)
+
+    @classmethod
+    def fromNetworks(cls, networks):
+        return cls(networkToRange(network, prefix) for network, prefix in networks)
+
+    @classmethod
+    def fromStrings(cls, networks):
+        parsed = (core.IPv4Network.fromString(network) for network in networks)
+        return cls((network.networkAddress, network.broadcastAddress) for network in parsed)
+
+    @classmethod
+    def _fromSorted(cls, starts:[], ends:[]):
+        result = cls.__new__(cls)
+        result._starts = starts
+        result._ends = ends
+        return result
+
+    def intervals(self) -> []:
+        return list(zip(self._starts, self._ends))
+
+    def toNetworks(self) -> []:
+        networks = []
+        for start, end in zip(self._starts, self._ends):
+            networks.extend(rangeToNetworks(start, end))
+        return networks
+
+    def toStrings(self) -> []:
+        return [str(core.IPv4Network(network, prefix)) for network, prefix in self.toNetworks()]
+
+    @property
+    def size(self) -> int:
+        return sum(self._ends) - sum(self._starts) + len(self._starts)
+
+    def contains(self, address:int) -> bool:
+        i = bisect.bisect_right(self._starts, address) - 1
+        return i >= 0 and address <= self._ends[i]
+
+    def containsRange(self, start:int, end:int) -> bool:
+        i = bisect.bisect_right(self._starts, start) - 1
+        return i >= 0 and end <= self._ends[i]
+
+    def isSubset(self, other) -> bool:
+        return all(other.containsRange(start, end) for start, end in zip(self._starts, self._ends))
+
+    def overlaps(self, other) -> bool:
+        i = j = 0
+        while i < len(self._starts) and j < len(other._starts):
+            if self._starts[i] <= other._ends[j] and other._starts[j] <= self._ends[i]:
+                return True
+            if self._ends[i] < other._ends[j]:
+                i += 1
+            else:
+                j += 1
+        return False
+
+    def union(self, other):
+        starts = []
+        ends = []
+        for start, end in _mergeSorted(self, other):
+            if ends and start <= ends[-1] + 1:
+                if end > ends[-1]:
+                    ends[-1] = end
+            else:
+                starts.append(start)
+                ends.append(end)
+
+        return AddressSet._fromSorted(starts, ends)
+
+    def intersection(self, other):
+        starts = []
+        ends = []
+        i = j = 0
+        while i < len(self._starts) and j < len(other._starts):
+            start = max(self._starts[i], other._starts[j])
+            end = min(self._ends[i], other._ends[j])
+            if start <= end:
+                starts.append(start)
+                ends.append(end)
+
+            if self._ends[i] < other._ends[j]:
+                i += 1
+            else:
+                j += 1
+
+        return AddressSet._fromSorted(starts, ends)
+
+    def difference(self, other):
+        starts = []
+        ends = []
+        j = 0
+        for start, end in zip(self._starts, self._ends):
+            while j < len(other._starts) and other._ends[j] < start:
+                j += 1
+
+            k = j
+            while k < len(other._starts) and other._starts[k] <= end:
+                if other._starts[k] > start:
+                    starts.append(start)
+                    ends.append(other._starts[k] - 1)
+                start = other._ends[k] + 1
+                if start > end:
+                    break
+                k += 1
+
+            if start <= end:
+                starts.append(start)
+                ends.append(end)
+
+        return AddressSet._fromSorted(starts, ends)
+
+    def symmetricDifference(self, other):
+        return self.union(other).difference(self.intersection(other))
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+    __xor__ = symmetricDifference
+
+    def __contains__(self, address):
+        return self.contains(int(address))
+
+    def __iter__(self):
+        return zip(self._starts, self._ends)
+
+    def __bool__(self):
+        return bool(self._starts)
+
+    def __eq__(self, other):
+        if not isinstance(other, AddressSet):
+            return NotImplemented
+        return self._starts == other._starts and self._ends == other._ends
+
+    def __repr__(self):
+        return f'AddressSet({self.toStrings()})'
+
+def _mergeSorted(first:AddressSet, second:AddressSet):
+    i = j = 0
+    while i < len(first._starts) or j < len(second._starts):
+        if j == len(second._starts) or i < len(first._starts) and first._starts[i] <= second._starts[j]:
+            yield first._starts[i], first._ends[i]
+            i += 1
+        else:
+            yield second._starts[j], second._ends[j]
+            j += 1
@@ -0,0 +1,154 @@
+import argparse
+import sys
+
+import numpy as np
+
+import codec
+import core
+
+# Streaming per prefix histograms: how many addresses fall into each enclosing
+# network at one or more prefix lengths. Short prefixes are counted in a dense
+# bincount array indexed by network number. Longer prefixes are counted per
+# chunk with numpy unique and merged into sorted (network, count) arrays, so
+# memory follows the number of distinct networks instead of 2 ** prefix.
+
+DENSE_MAX_PREFIX = 20
+DEFAULT_CHUNK_SIZE = 1 << 22
+
+class PrefixHistogram:
+    def __init__(self, prefixes, denseMaxPrefix = DENSE_MAX_PREFIX):
+        if isinstance(prefixes, int):
+            prefixes = [prefixes]
+
+        self.prefixes = sorted(set(prefixes))
+        for prefix in self.prefixes:
+            if prefix < 0 or prefix > 32:
+                raise ValueError(f'{prefix} is not a valid prefix length')
+
+        self.total = 0
+        self.invalid = 0
+        self._dense = {prefix: np.zeros(1 << prefix, dtype=np.int64) for prefix in self.prefixes if prefix <= denseMaxPrefix}
+        self._sparse = {prefix: (np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.int64))
+                        for prefix in self.prefixes if prefix > denseMaxPrefix}
+
+    def add(self, addresses):
+        addresses = np.asarray(addresses, dtype=np.uint32).ravel()
+        self.total += len(addresses)
+
+        for prefix, counts in self._dense.items():
+            if prefix == 0:
+                counts[0] += len(addresses)
+            else:
+                counts += np.bincount(addresses >> np.uint32(32 - prefix), minlength=len(counts))
+
+        for prefix, (networks, counts) in self._sparse.items():
+            chunkNetworks, chunkCounts = np.unique(addresses & np.uint32(core.PREFIX_MASKS[prefix]), return_counts=True)
+            self._sparse[prefix] = _mergeCounts(networks, counts, chunkNetworks, chunkCounts)
+
+    def addText(self, buffer:bytes):
+        # Newline separated dotted decimal addresses, invalid lines are counted and skipped
+        decoded = np.frombuffer(codec.decodeAddresses(buffer), dtype=np.int64)
+        valid = decoded >= 0
+        self.invalid += len(decoded) - int(np.count_nonzero(valid))
+        self.add(decoded[valid].astype(np.uint32))
+
+    def table(self, prefix:int) -> tuple[np.ndarray, np.ndarray]:
+        # Networks that were seen and their counts, sorted by network address
+        if prefix in self._dense:
+            counts = self._dense[prefix]
+            indices = np.flatnonzero(counts)
+            networks = (indices.astype(np.uint64) << np.uint64(32 - prefix)).astype(np.uint32)
+            return networks, counts[indices]
+
+        if prefix in self._sparse:
+            return self._sparse[prefix]
+
+        raise KeyError(f'/{prefix} is not being counted')
+
+    def top(self, prefix:int, k:int) -> []:
+        networks, counts = self.table(prefix)
+        if k < len(counts):
+            # Keep everything tied with the k-th largest count so ties break on the network below
+            selected = counts >= np.partition(counts, -k)[-k]
+            networks = networks[selected]
+            counts = counts[selected]
+
+        # Largest count first, lower network first on ties
+        order = np.lexsort((networks, -counts))[:k]
+        return list(zip(networks[order].tolist(), counts[order].tolist()))
+
+def _mergeCounts(networks, counts, otherNetworks, otherCounts) -> tuple[np.ndarray, np.ndarray]:
+    if not len(networks):
+        return otherNetworks, otherCounts.astype(np.int64)
+
+    allNetworks = np.concatenate((networks, otherNetworks))
+    allCounts = np.concatenate((counts, otherCounts))
+    order = np.argsort(allNetworks, kind='stable')
+    allNetworks = allNetworks[order]
+    allCounts = allCounts[order]
+
+    starts = np.flatnonzero(np.concatenate(([True], allNetworks[1:] != allNetworks[:-1])))
+    return allNetworks[starts], np.add.reduceat(allCounts, starts)
+
+def readChunks(stream, chunkSize = DEFAULT_CHUNK_SIZE):
+    # Binary chunks that always end on a line boundary
+    remainder = b''
+    while True:
+        data = stream.read(chunkSize)
+        if not data:
+            break
+
+        data = remainder + data
+        cut = data.rfind(b'\n') + 1
+        remainder = data[cut:]
+        if cut:
+            yield data[:cut]
+
+    if remainder:
+        yield remainder
+
+def aggregateStreams(streams, prefixes, chunkSize = DEFAULT_CHUNK_SIZE, denseMaxPrefix = DENSE_MAX_PREFIX) -> PrefixHistogram:
+    histogram = PrefixHistogram(prefixes, denseMaxPrefix)
+    for stream in streams:
+        for chunk in readChunks(stream, chunkSize):
+            histogram.addText(chunk)
+    return histogram
+
+def openInputs(paths:[]):
+    for path in paths or ['-']:
+        if path == '-':
+            yield sys.stdin.buffer
+        else:
+            with open(path, 'rb') as stream:
+                yield stream
+
+def main(argv = None) -> int:
+    parser = argparse.ArgumentParser(description='Count addresses per enclosing network.')
+    parser.add_argument('inputs', nargs='*', help='files with one address per line, stdin when omitted or "-"')
+    parser.add_argument('-p', '--prefix', dest='prefixes', type=int, action='append', required=True,
+                        help='prefix length to count at, can repeat')
+    parser.add_argument('-k', '--top', type=int, help='only write the K largest networks per prefix')
+    parser.add_argument('--chunk-size', dest='chunkSize', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    try:
+        histogram = aggregateStreams(openInputs(args.inputs), args.prefixes, args.chunkSize)
+    except ValueError as e:
+        parser.error(str(e))
+
+    out = sys.stdout
+    out.write('prefix,network,count\n')
+    for prefix in histogram.prefixes:
+        if args.top:
+            rows = histogram.top(prefix, args.top)
+        else:
+            networks, counts = histogram.table(prefix)
+            rows = zip(networks.tolist(), counts.tolist())
+
+        out.writelines(f'{prefix},{codec.formatAddress(network)}/{prefix},{count}\n' for network, count in rows)
+
+    print(f'{histogram.total} addresses, {histogram.invalid} invalid lines skipped', file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+import heapq
+import os
+import struct
+
+import addressset
+import core
+import vlsm
+
+# Buddy allocator for subnets of a supernet. Free blocks are kept per prefix
+# length, each as a set for membership plus a heap so the lowest free block is
+# handed out first. Released blocks are merged with their buddy whenever the
+# buddy is free too, so the free lists always hold maximal aligned blocks.
+# A merge only removes the buddy from the set; its heap entry goes stale and
+# the heap is rebuilt once stale entries outnumber the live ones, so heap
+# sizes stay within twice the free block count.
+
+SNAPSHOT_MAGIC = b'IPBA'
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct('<4sBIBI')
+_ENTRY = struct.Struct('<IBH')
+
+class BuddyAllocator:
+    def __init__(self, network:int, prefix:int):
+        if prefix < 0 or prefix > 32:
+            raise ValueError(f'{prefix} is not a valid prefix length')
+
+        self.network = network & core.PREFIX_MASKS[prefix]
+        self.prefix = prefix
+        self._free = [set() for _ in range(33)]
+        self._heaps = [[] for _ in range(33)]
+        self._allocated = {}
+
+        self._addFree(self.network, prefix)
+
+    def _addFree(self, network:int, prefix:int):
+        self._free[prefix].add(network)
+        heapq.heappush(self._heaps[prefix], network)
+
+    def _removeFree(self, network:int, prefix:int):
+        self._free[prefix].remove(network)
+        self._compactHeap(prefix)
+
+    def _popFree(self, prefix:int) -> int:
+        # Heaps are cleaned lazily, entries removed by a merge are skipped here
+        heap = self._heaps[prefix]
+        free = self._free[prefix]
+        while True:
+            network = heapq.heappop(heap)
+            if network in free:
+                free.remove(network)
+                self._compactHeap(prefix)
+                return network
+
+    def _compactHeap(self, prefix:int):
+        free = self._free[prefix]
+        if len(self._heaps[prefix]) > 2 * len(free):
+            self._heaps[prefix] = sorted(free) # A sorted list is already a heap
+
+    def allocatePrefix(self, prefix:int, label = ''):
+        if prefix < self.prefix or prefix > 32:
+            return None
+
+        # Best fit is the smallest free block that is at least as large as requested
+        blockPrefix = prefix
+        while blockPrefix >= self.prefix and not self._free[blockPrefix]:
+            blockPrefix -= 1
+        if blockPrefix < self.prefix:
+            return None
+
+        network = self._popFree(blockPrefix)
+        while blockPrefix < prefix:
+            blockPrefix += 1
+            self._addFree(network | 1 << (32 - blockPrefix), blockPrefix)
+
+        self._allocated[network] = (prefix, label)
+        return network, prefix
+
+    def allocate(self, hostsNum:int, label = ''):
+        prefix = vlsm.prefixForHosts(hostsNum)
+        if prefix == -1:
+            return None
+
+        return self.allocatePrefix(prefix, label)
+
+    def release(self, network:int) -> int:
+        prefix, _ = self._allocated.pop(network)
+        released = prefix
+
+        while prefix > self.prefix:
+            buddy = network ^ 1 << (32 - prefix)
+            if buddy not in self._free[prefix]:
+                break
+
+            self._removeFree(buddy, prefix)
+            network &= core.PREFIX_MASKS[prefix - 1]
+            prefix -= 1
+
+        self._addFree(network, prefix)
+        return released
+
+    def allocations(self) -> []:
+        return sorted((network, prefix, label) for network, (prefix, label) in self._allocated.items())
+
+    def freeBlocks(self) -> []:
+        return sorted((network, prefix) for prefix in range(33) for network in self._free[prefix])
+
+    @property
+    def freeAddresses(self) -> int:
+        return sum(len(self._free[prefix]) * (core.HOST_MASKS[prefix] + 1) for prefix in range(33))
+
+    def __contains__(self, network):
+        return network in self._allocated
+
+    def __len__(self):
+        return len(self._allocated)
+
+    # Snapshots store the supernet and the allocations. The free lists are
+    # rebuilt on load from the gaps between allocations, which are exactly the
+    # maximal aligned blocks a fully merged buddy system holds.
+
+    def toBytes(self) -> bytes:
+        parts = [_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.network, self.prefix, len(self._allocated))]
+        for network, prefix, label in self.allocations():
+            encoded = label.encode('utf-8')
+            parts.append(_ENTRY.pack(network, prefix, len(encoded)))
+            parts.append(encoded)
+
+        return b''.join(parts)
+
+    @classmethod
+    def fromBytes(cls, data:bytes):
+        magic, version, network, prefix, count = _HEADER.unpack_from(data, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError('not a subnet allocator snapshot')
+
+        allocator = cls(network, prefix)
+        allocator._free[prefix].clear()
+        allocator._heaps[prefix].clear()
+
+        offset = _HEADER.size
+        cursor = allocator.network
+        end = allocator.network | core.HOST_MASKS[prefix]
+        for _ in range(count):
+            blockNetwork, blockPrefix, labelLength = _ENTRY.unpack_from(data, offset)
+            offset += _ENTRY.size
+            label = data[offset:offset + labelLength].decode('utf-8')
+            offset += labelLength
+
+            if blockNetwork < cursor or blockNetwork | core.HOST_MASKS[blockPrefix] > end:
+                raise ValueError('snapshot allocations overlap or fall outside the supernet')
+
+            allocator._addFreeRange(cursor, blockNetwork - 1)
+            allocator._allocated[blockNetwork] = (blockPrefix, label)
+            cursor = (blockNetwork | core.HOST_MASKS[blockPrefix]) + 1
+
+        allocator._addFreeRange(cursor, end)
+        return allocator
+
+    def _addFreeRange(self, start:int, end:int):
+        for network, prefix in addressset.rangeToNetworks(start, end):
+            self._addFree(network, prefix)
+
+    def save(self, path:str):
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as stream:
+            stream.write(self.toBytes())
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path:str):
+        with open(path, 'rb') as stream:
+            return cls.fromBytes(stream.read())
@@ -0,0 +1,109 @@
+import typing
+
+import numpy as np
+
+import core
+import ipv6
+
+# Vectorized versions of the address calculations in core. Addresses and
+# masks are numpy uint32 arrays holding packed addresses (see core.packIpAddress).
+
+PREFIX_MASKS = np.array(core.PREFIX_MASKS, dtype=np.uint32)
+
+class BatchResult(typing.NamedTuple):
+    networkAddress: np.ndarray
+    broadcastAddress: np.ndarray
+    firstAddress: np.ndarray
+    lastAddress: np.ndarray
+    addressCount: np.ndarray
+
+def asAddressArray(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.uint32)
+
+def packOctets(octets) -> np.ndarray:
+    octets = np.asarray(octets, dtype=np.uint32).reshape(-1, 4) & 0xFF
+    return (octets[:, 0] << 24) | (octets[:, 1] << 16) | (octets[:, 2] << 8) | octets[:, 3]
+
+def unpackOctets(addresses) -> np.ndarray:
+    addresses = asAddressArray(addresses)
+    return np.stack([
+        addresses >> 24 & 0xFF,
+        addresses >> 16 & 0xFF,
+        addresses >> 8 & 0xFF,
+        addresses & 0xFF], axis=-1).astype(np.uint8)
+
+def masksFromPrefixes(prefixes) -> np.ndarray:
+    prefixes = np.asarray(prefixes)
+    if prefixes.size and (prefixes.min() < 0 or prefixes.max() > 32):
+        raise ValueError('prefix lengths must be between 0 and 32')
+
+    return PREFIX_MASKS[prefixes]
+
+def calculateNetworkAddresses(addresses, masks) -> np.ndarray:
+    return asAddressArray(addresses) & asAddressArray(masks)
+
+def calculateBroadcastAddresses(addresses, masks) -> np.ndarray:
+    return asAddressArray(addresses) | ~asAddressArray(masks)
+
+def calculateFirstAndLastAddresses(networkAddresses, broadcastAddresses) -> tuple[np.ndarray, np.ndarray]:
+    # uint32 arithmetic wraps around for /32 exactly like core.calculateFirstAndLastAddress
+    one = np.uint32(1)
+    return asAddressArray(networkAddresses) + one, asAddressArray(broadcastAddresses) - one
+
+def calculateAddressRanges(lowerAddresses, higherAddresses) -> np.ndarray:
+    return (asAddressArray(higherAddresses).astype(np.int64)
+            - asAddressArray(lowerAddresses).astype(np.int64) + 1)
+
+def calculate(addresses, masks = None, prefixes = None) -> BatchResult:
+    if (masks is None) == (prefixes is None):
+        raise ValueError('exactly one of masks or prefixes must be given')
+
+    if masks is None:
+        masks = masksFromPrefixes(prefixes)
+
+    addresses = asAddressArray(addresses)
+    masks = asAddressArray(masks)
+
+    networkAddress = calculateNetworkAddresses(addresses, masks)
+    broadcastAddress = calculateBroadcastAddresses(addresses, masks)
+    firstAddress, lastAddress = calculateFirstAndLastAddresses(networkAddress, broadcastAddress)
+    addressCount = calculateAddressRanges(firstAddress, lastAddress)
+
+    return BatchResult(networkAddress, broadcastAddress, firstAddress, lastAddress, addressCount)
+
+# IPv6 addresses are held in two uint64 lanes, the high and the low 64 bits
+
+PREFIX_MASKS6_HIGH = np.array([mask >> 64 for mask in ipv6.PREFIX_MASKS], dtype=np.uint64)
+PREFIX_MASKS6_LOW = np.array([mask & 0xFFFFFFFFFFFFFFFF for mask in ipv6.PREFIX_MASKS], dtype=np.uint64)
+
+class BatchResult6(typing.NamedTuple):
+    networkHigh: np.ndarray
+    networkLow: np.ndarray
+    lastHigh: np.ndarray
+    lastLow: np.ndarray
+    hostBits: np.ndarray # Size of each network is 2 ** hostBits, which does not fit a uint64 below /64
+
+def splitAddresses6(addresses) -> tuple[np.ndarray, np.ndarray]:
+    high = np.fromiter((address >> 64 for address in addresses), dtype=np.uint64)
+    low = np.fromiter((address & 0xFFFFFFFFFFFFFFFF for address in addresses), dtype=np.uint64)
+    return high, low
+
+def joinAddresses6(high, low) -> []:
+    return [h << 64 | l for h, l in zip(np.asarray(high).tolist(), np.asarray(low).tolist())]
+
+def calculate6(high, low, prefixes) -> BatchResult6:
+    prefixes = np.asarray(prefixes)
+    if prefixes.size and (prefixes.min() < 0 or prefixes.max() > 128):
+        raise ValueError('prefix lengths must be between 0 and 128')
+
+    high = np.asarray(high, dtype=np.uint64)
+    low = np.asarray(low, dtype=np.uint64)
+    maskHigh = PREFIX_MASKS6_HIGH[prefixes]
+    maskLow = PREFIX_MASKS6_LOW[prefixes]
+
+    return BatchResult6(
+        high & maskHigh,
+        low & maskLow,
+        high | ~maskHigh,
+        low | ~maskLow,
+        (128 - prefixes).astype(np.uint8))
@@ -0,0 +1,271 @@
+import argparse
+import inspect
+import ipaddress
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import core
+
+# Benchmarks for every public function in core, with the stdlib ipaddress module
+# as a baseline where it has an equivalent. Results are written as JSON and can
+# be compared with a stored baseline to catch slowdowns.
+
+DEFAULT_SIZE = 20000
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 1.25
+INVALID_RATIO = 0.3
+
+# Modules that must import quickly and without the GUI toolkit
+GUI_FREE_MODULES = ['core', 'codec', 'cli']
+GUI_MODULES = ['PySide6', 'shiboken6']
+DEFAULT_IMPORT_BUDGET_MS = 50.0
+
+class Workload:
+    def __init__(self, size:int, seed:int):
+        rng = random.Random(seed)
+
+        self.octetLists = [[rng.randrange(256) for _ in range(4)] for _ in range(size)]
+        self.addresses = [core.packIpAddress(octets) for octets in self.octetLists]
+        self.strings = ['.'.join(map(str, octets)) for octets in self.octetLists]
+        self.binaryStrings = [core.serializeIpAddress(octets, True) for octets in self.octetLists]
+        self.octets = [octets[0] for octets in self.octetLists]
+        self.octetStrings = [str(octet) for octet in self.octets]
+
+        # Every prefix length shows up equally often
+        self.prefixes = [i % 33 for i in range(size)]
+        rng.shuffle(self.prefixes)
+        self.masks = [core.calculateSubnetMaskFromShortMask(prefix) for prefix in self.prefixes]
+        self.packedMasks = [core.PREFIX_MASKS[prefix] for prefix in self.prefixes]
+        self.maskOctets = [mask[rng.randrange(4)] for mask in self.masks]
+        self.maskStrings = ['.'.join(map(str, mask)) for mask in self.masks]
+        self.hostCounts = [rng.randrange(1 << 24) for _ in range(size)]
+
+        self.networks = [core.calculateNetworkAddress(ip, mask) for ip, mask in zip(self.octetLists, self.masks)]
+        self.broadcasts = [core.calculateBroadcastAddress(ip, mask) for ip, mask in zip(self.octetLists, self.masks)]
+        self.ranges = [core.calculateFirstAndLastAddress(n, b) for n, b in zip(self.networks, self.broadcasts)]
+        self.networkStrings = [f'{s}/{p}' for s, p in zip(self.strings, self.prefixes)]
+
+        # Invalid mix: malformed strings, out of range octets and non-contiguous masks
+        self.mixedStrings = list(self.strings)
+        self.mixedMasks = [list(mask) for mask in self.masks]
+        self.mixedOctetStrings = list(self.octetStrings)
+        for i in rng.sample(range(size), int(size * INVALID_RATIO)):
+            self.mixedStrings[i] = rng.choice(['1.2.3', '256.1.1.1', 'a.b.c.d', '1..2.3', '', '10.0.0.999'])
+            self.mixedMasks[i][rng.randrange(4)] = rng.choice([1, 3, 17, 300, -1])
+            self.mixedOctetStrings[i] = rng.choice(['', 'x', '1a', '-', '9999'])
+
+def benchmarks(w:Workload) -> dict:
+    # name: (core callable, ipaddress callable or None, number of items processed)
+    IPv4Address = ipaddress.IPv4Address
+    IPv4Network = ipaddress.IPv4Network
+
+    def stdlibParse(strings):
+        for s in strings:
+            try:
+                IPv4Address(s)
+            except ValueError:
+                pass
+
+    def stdlibMaskValidation(masks):
+        for mask in masks:
+            try:
+                IPv4Network('0.0.0.0/' + mask)
+            except ValueError:
+                pass
+
+    n = len(w.addresses)
+    return {
+        'parseOctet': (lambda: [core.parseOctet(s) for s in w.octetStrings], None, n),
+        'parseOctet.invalidMix': (lambda: [core.parseOctet(s) for s in w.mixedOctetStrings], None, n),
+        'parseIpAddress': (lambda: [core.parseIpAddress(s) for s in w.strings], lambda: stdlibParse(w.strings), n),
+        'parseIpAddress.binary': (lambda: [core.parseIpAddress(s, True) for s in w.binaryStrings], None, n),
+        'parseIpAddress.invalidMix': (lambda: [core.parseIpAddress(s) for s in w.mixedStrings], lambda: stdlibParse(w.mixedStrings), n),
+        'serializeOctet': (lambda: [core.serializeOctet(o) for o in w.octets], None, n),
+        'serializeOctet.binary': (lambda: [core.serializeOctet(o, True) for o in w.octets], None, n),
+        'serializeIpAddress': (lambda: [core.serializeIpAddress(o) for o in w.octetLists],
+                               lambda: [str(IPv4Address(a)) for a in w.addresses], n),
+        'serializeIpAddress.binary': (lambda: [core.serializeIpAddress(o, True) for o in w.octetLists], None, n),
+        'isValidIpOctet': (lambda: [core.isValidIpOctet(o) for o in w.octets], None, n),
+        'isValidIpAddress': (lambda: [core.isValidIpAddress(o) for o in w.octetLists], None, n),
+        'isValidSubnetOctet': (lambda: [core.isValidSubnetOctet(o) for o in w.maskOctets], None, n),
+        'isValidSubnetMask': (lambda: [core.isValidSubnetMask(m) for m in w.masks], lambda: stdlibMaskValidation(w.maskStrings), n),
+        'isValidSubnetMask.invalidMix': (lambda: [core.isValidSubnetMask(m) for m in w.mixedMasks], None, n),
+        'networkBitsInOctetValue': (lambda: [core.networkBitsInOctetValue(o) for o in w.maskOctets], None, n),
+        'networkBitsInSubnetMask': (lambda: [core.networkBitsInSubnetMask(m) for m in w.masks], None, n),
+        'networkBitsToOctetValue': (lambda: [core.networkBitsToOctetValue(p % 9) for p in w.prefixes], None, n),
+        'calculateSubnetMaskFromShortMask': (lambda: [core.calculateSubnetMaskFromShortMask(p) for p in w.prefixes],
+                                             lambda: [IPv4Network((0, p)).netmask for p in w.prefixes], n),
+        'hostBitsForHosts': (lambda: [core.hostBitsForHosts(h) for h in w.hostCounts], None, n),
+        'calculateNetworkAddress': (lambda: [core.calculateNetworkAddress(ip, m) for ip, m in zip(w.octetLists, w.masks)],
+                                    lambda: [IPv4Network((a, p), strict=False).network_address for a, p in zip(w.addresses, w.prefixes)], n),
+        'calculateBroadcastAddress': (lambda: [core.calculateBroadcastAddress(ip, m) for ip, m in zip(w.octetLists, w.masks)],
+                                      lambda: [IPv4Network((a, p), strict=False).broadcast_address for a, p in zip(w.addresses, w.prefixes)], n),
+        'calculateFirstAndLastAddress': (lambda: [core.calculateFirstAndLastAddress(a, b) for a, b in zip(w.networks, w.broadcasts)], None, n),
+        'calculateAddressRange': (lambda: [core.calculateAddressRange(f, l) for f, l in w.ranges], None, n),
+        'packIpAddress': (lambda: [core.packIpAddress(o) for o in w.octetLists], lambda: [int(IPv4Address(bytes(o))) for o in w.octetLists], n),
+        'unpackIpAddress': (lambda: [core.unpackIpAddress(a) for a in w.addresses], lambda: [IPv4Address(a).packed for a in w.addresses], n),
+        'prefixFromMask': (lambda: [core.prefixFromMask(m) for m in w.packedMasks], None, n),
+        'IPv4Address.fromString': (lambda: [core.IPv4Address.fromString(s) for s in w.strings], lambda: [IPv4Address(s) for s in w.strings], n),
+        'IPv4Network': (lambda: [core.IPv4Network(a, p) for a, p in zip(w.addresses, w.prefixes)],
+                        lambda: [IPv4Network((a, p), strict=False) for a, p in zip(w.addresses, w.prefixes)], n),
+        'IPv4Network.fromString': (lambda: [core.IPv4Network.fromString(s) for s in w.networkStrings],
+                                   lambda: [IPv4Network(s, strict=False) for s in w.networkStrings], n),
+        'bulk.parseSerialize': (lambda: [core.serializeIpAddress(core.parseIpAddress(s)) for s in w.strings],
+                                lambda: [str(IPv4Address(s)) for s in w.strings], n),
+    }
+
+def timeCall(function, repeat:int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def publicCoreNames() -> []:
+    names = []
+    for name, value in vars(core).items():
+        if name.startswith('_') or getattr(value, '__module__', None) != 'core':
+            continue
+        if inspect.isfunction(value) or inspect.isclass(value):
+            names.append(name)
+    return names
+
+def run(size:int, repeat:int, seed:int, only = None) -> dict:
+    workload = Workload(size, seed)
+    results = {}
+
+    for name, (function, stdlibFunction, count) in benchmarks(workload).items():
+        if only and not any(pattern in name for pattern in only):
+            continue
+
+        result = {'nsPerOp': timeCall(function, repeat) / count * 1e9}
+        if stdlibFunction is not None:
+            result['ipaddressNsPerOp'] = timeCall(stdlibFunction, repeat) / count * 1e9
+            result['speedupVsIpaddress'] = result['ipaddressNsPerOp'] / result['nsPerOp']
+        results[name] = result
+
+    return results
+
+def missingBenchmarks(results:dict) -> []:
+    covered = {name.split('.')[0] for name in results}
+    return [name for name in publicCoreNames() if name not in covered]
+
+def compareWithBaseline(results:dict, baseline:dict, threshold:float) -> []:
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+
+        ratio = result['nsPerOp'] / previous['nsPerOp']
+        result['vsBaseline'] = ratio
+        if ratio > threshold:
+            regressions.append((name, ratio))
+
+    return regressions
+
+def printReport(results:dict, stream):
+    print(f'{"benchmark":<36}{"ns/op":>12}{"ipaddress":>12}{"speedup":>10}{"vs base":>10}', file=stream)
+    for name, result in results.items():
+        stdlib = result.get('ipaddressNsPerOp')
+        speedup = result.get('speedupVsIpaddress')
+        versus = result.get('vsBaseline')
+        print(f'{name:<36}{result["nsPerOp"]:>12.1f}'
+              f'{"" if stdlib is None else format(stdlib, ".1f"):>12}'
+              f'{"" if speedup is None else format(speedup, ".2f") + "x":>10}'
+              f'{"" if versus is None else format(versus, ".2f") + "x":>10}', file=stream)
+
+def measureImport(module:str, repeat:int) -> tuple[float, []]:
+    # Each measurement runs in a fresh interpreter so nothing is cached in sys.modules
+    script = (
+        'import sys, time\n'
+        'started = time.perf_counter()\n'
+        f'import {module}\n'
+        'elapsed = time.perf_counter() - started\n'
+        f'print(elapsed, *[m for m in {GUI_MODULES!r} if m in sys.modules])\n')
+
+    best = float('inf')
+    loaded = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+        best = min(best, float(output[0]))
+        loaded = output[1:]
+
+    return best * 1000, loaded
+
+def checkImports(budgetMs:float, repeat:int, stream) -> []:
+    failures = []
+    for module in GUI_FREE_MODULES:
+        milliseconds, loaded = measureImport(module, repeat)
+        print(f'import {module:<30}{milliseconds:>9.1f} ms', file=stream)
+
+        if loaded:
+            failures.append(f'importing {module} loads {", ".join(loaded)}')
+        if milliseconds > budgetMs:
+            failures.append(f'importing {module} takes {milliseconds:.1f} ms (budget {budgetMs:.1f} ms)')
+
+    return failures
+
+def createArgumentParser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Benchmark the functions in core.py.')
+    parser.add_argument('-n', '--size', type=int, default=DEFAULT_SIZE, help='items per benchmark')
+    parser.add_argument('-r', '--repeat', type=int, default=DEFAULT_REPEAT, help='timing repeats, the best one is kept')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-k', '--only', action='append', help='run only benchmarks whose name contains this, can repeat')
+    parser.add_argument('-o', '--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='compare against results JSON written earlier')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='fail when a benchmark is this many times slower than the baseline')
+    parser.add_argument('--imports', action='store_true',
+                        help='only check that GUI free modules import within the budget and without PySide6')
+    parser.add_argument('--import-budget', dest='importBudget', type=float, default=DEFAULT_IMPORT_BUDGET_MS,
+                        help='import time budget in milliseconds')
+    return parser
+
+def main(argv = None) -> int:
+    args = createArgumentParser().parse_args(argv)
+
+    if args.imports:
+        failures = checkImports(args.importBudget, args.repeat, sys.stdout)
+        for failure in failures:
+            print(f'import check failed: {failure}', file=sys.stderr)
+        return 1 if failures else 0
+
+    results = run(args.size, args.repeat, args.seed, args.only)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as stream:
+            regressions = compareWithBaseline(results, json.load(stream), args.threshold)
+
+    printReport(results, sys.stdout)
+
+    if not args.only:
+        for name in missingBenchmarks(results):
+            print(f'warning: no benchmark for core.{name}', file=sys.stderr)
+
+    if args.output:
+        report = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'size': args.size,
+            'repeat': args.repeat,
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as stream:
+            json.dump(report, stream, indent=2)
+
+    for name, ratio in regressions:
+        print(f'regression: {name} is {ratio:.2f}x slower than the baseline (threshold {args.threshold:.2f}x)', file=sys.stderr)
+
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,295 @@
+import argparse
+import collections
+import concurrent.futures
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+import codec
+import core
+
+# Headless bulk calculator. Reads "ip/mask" or "ip/prefix" lines and writes one
+# row per line with the same information NetworkInfoGroup shows.
+
+FIELDS = ['input', 'network', 'broadcast', 'first', 'last', 'count']
+
+ERROR_POLICIES = ['strict', 'skip', 'emit']
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+DEFAULT_SPLIT_SIZE = 1 << 22
+
+class RowError(ValueError):
+    def __init__(self, message:str, lineNumber = None):
+        super().__init__(message)
+        self.message = message
+        self.lineNumber = lineNumber
+
+    def __str__(self):
+        if self.lineNumber is None:
+            return self.message
+        return f'line {self.lineNumber}: {self.message}'
+
+def parseLine(line:str) -> core.IPv4Network:
+    address, separator, mask = line.partition('/')
+    if not separator:
+        raise RowError('expected ip/mask or ip/prefix')
+
+    ip = core.parseIpAddress(address.strip())
+    if not core.isValidIpAddress(ip):
+        raise RowError(f'invalid IP address {address.strip()!r}')
+
+    mask = mask.strip()
+    if '.' in mask:
+        subnetMask = core.parseIpAddress(mask)
+        if not core.isValidSubnetMask(subnetMask):
+            raise RowError(f'invalid subnet mask {mask!r}')
+        prefix = core.prefixFromMask(core.packIpAddress(subnetMask))
+    else:
+        prefix = core.parseOctet(mask)
+        if prefix < 0 or prefix > 32:
+            raise RowError(f'invalid prefix length {mask!r}')
+
+    return core.IPv4Network(core.packIpAddress(ip), prefix)
+
+def calculateRow(network:core.IPv4Network) -> []:
+    firstAddress = network.firstAddress
+    lastAddress = network.lastAddress
+
+    return [
+        codec.formatAddress(network.networkAddress),
+        codec.formatAddress(network.broadcastAddress),
+        codec.formatAddress(firstAddress),
+        codec.formatAddress(lastAddress),
+        lastAddress - firstAddress + 1
+    ]
+
+# Pipeline stages
+
+class Stats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.lines = 0
+        self.bytes = 0
+
+    def report(self, stream):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        print(f'{self.lines} lines, {self.bytes / 1e6:.1f} MB in {elapsed:.2f} s '
+              f'({self.lines / elapsed:,.0f} lines/s, {self.bytes / 1e6 / elapsed:.1f} MB/s)', file=stream)
+
+def readLines(streams, chunkSize = DEFAULT_CHUNK_SIZE, stats = None):
+    for stream in streams:
+        while True:
+            lines = stream.readlines(chunkSize)
+            if not lines:
+                break
+            if stats is not None:
+                stats.lines += len(lines)
+                stats.bytes += sum(map(len, lines))
+            yield from lines
+
+def calculateRows(lines, errors = 'strict', lineOffset = 0):
+    for lineNumber, line in enumerate(lines, lineOffset + 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        try:
+            row = calculateRow(parseLine(line))
+            if errors == 'emit':
+                row.append('') # Every row carries the error column of the header
+        except RowError as e:
+            if errors == 'strict':
+                raise RowError(e.message, lineNumber) from None
+            if errors == 'skip':
+                continue
+            row = ['', '', '', '', '', e.message]
+
+        row.insert(0, line)
+        yield row
+
+class ChunkedWriter:
+    def __init__(self, stream, chunkSize = DEFAULT_CHUNK_SIZE):
+        self.stream = stream
+        self.chunkSize = chunkSize
+        self.parts = []
+        self.size = 0
+
+    def write(self, text:str):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.chunkSize:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.stream.write(''.join(self.parts))
+            self.parts = []
+            self.size = 0
+        self.stream.flush()
+
+def writeCsv(rows, writer, fields:[], header = True):
+    csvWriter = csv.writer(writer, lineterminator='\n')
+    if header:
+        csvWriter.writerow(fields)
+    for row in rows:
+        csvWriter.writerow(row)
+
+def writeJsonl(rows, writer, fields:[], header = True):
+    for row in rows:
+        writer.write(json.dumps(dict(zip(fields, row))) + '\n')
+
+WRITERS = {'csv': writeCsv, 'jsonl': writeJsonl}
+
+def openInputs(paths:[]):
+    if not paths:
+        yield sys.stdin
+        return
+
+    for path in paths:
+        if path == '-':
+            yield sys.stdin
+        else:
+            with open(path, encoding='utf-8', errors='replace') as stream:
+                yield stream
+
+# Parallel mode
+#
+# Inputs are split into byte ranges that end on a line boundary. Each range is
+# calculated and formatted in a worker process and the formatted text is
+# written back in input order.
+
+def splitFile(path:str, splitSize:int):
+    size = os.path.getsize(path)
+    with open(path, 'rb') as stream:
+        start = 0
+        while start < size:
+            end = min(start + splitSize, size)
+            if end < size:
+                stream.seek(end)
+                end += len(stream.readline())
+            yield path, start, end, None
+            start = end
+
+def splitStream(stream, splitSize:int):
+    remainder = b''
+    while True:
+        data = stream.read(splitSize)
+        if not data:
+            break
+
+        data = remainder + data
+        cut = data.rfind(b'\n') + 1
+        remainder = data[cut:]
+        if cut:
+            yield None, 0, cut, data[:cut]
+
+    if remainder:
+        yield None, 0, len(remainder), remainder
+
+def splitInputs(paths:[], splitSize:int):
+    for path in paths or ['-']:
+        if path == '-':
+            yield from splitStream(sys.stdin.buffer, splitSize)
+        else:
+            yield from splitFile(path, splitSize)
+
+def processChunk(chunk, outputFormat:str, fields:[], errors:str) -> tuple[str, int, tuple]:
+    path, start, end, data = chunk
+    if data is None:
+        with open(path, 'rb') as stream:
+            stream.seek(start)
+            data = stream.read(end - start)
+
+    lines = data.decode('utf-8', errors='replace').split('\n')
+    if lines[-1] == '':
+        lines.pop()
+
+    output = io.StringIO()
+    try:
+        WRITERS[outputFormat](calculateRows(lines, errors), output, fields, header=False)
+    except RowError as e:
+        return output.getvalue(), len(lines), (e.lineNumber, e.message)
+
+    return output.getvalue(), len(lines), None
+
+def runParallel(args, writer:ChunkedWriter, fields:[], stats:Stats):
+    if args.format == 'csv':
+        writeCsv([], writer, fields)
+
+    with concurrent.futures.ProcessPoolExecutor(args.workers) as executor:
+        pending = collections.deque()
+        chunks = splitInputs(args.inputs, args.splitSize)
+        lineOffset = 0
+
+        def submitNext() -> bool:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return False
+            stats.bytes += chunk[2] - chunk[1]
+            pending.append(executor.submit(processChunk, chunk, args.format, fields, args.errors))
+            return True
+
+        # Keep a bounded window of chunks in flight so memory does not grow with the input
+        while len(pending) < args.workers * 2 and submitNext():
+            pass
+
+        while pending:
+            text, lineCount, error = pending.popleft().result()
+            writer.write(text)
+            if error is not None:
+                for future in pending:
+                    future.cancel()
+                raise RowError(error[1], lineOffset + error[0])
+
+            lineOffset += lineCount
+            stats.lines += lineCount
+            submitNext()
+
+def createArgumentParser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Calculate network information for ip/mask or ip/prefix lines.')
+    parser.add_argument('inputs', nargs='*', help='input files, stdin when omitted or "-"')
+    parser.add_argument('-f', '--format', choices=sorted(WRITERS), default='csv')
+    parser.add_argument('-o', '--output', help='output file, stdout when omitted')
+    parser.add_argument('--errors', choices=ERROR_POLICIES, default='strict',
+                        help='strict stops at the first malformed row, skip drops it, emit writes it with an error column')
+    parser.add_argument('--chunk-size', dest='chunkSize', type=int, default=DEFAULT_CHUNK_SIZE, help='read and write chunk size in bytes')
+    parser.add_argument('-j', '--workers', type=int, default=1, help='worker processes, 0 for one per CPU')
+    parser.add_argument('--split-size', dest='splitSize', type=int, default=DEFAULT_SPLIT_SIZE,
+                        help='size in bytes of the input ranges handed to each worker')
+    parser.add_argument('--stats', action='store_true', help='report throughput on stderr')
+    return parser
+
+def run(args) -> int:
+    fields = FIELDS + ['error'] if args.errors == 'emit' else FIELDS
+    output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    writer = ChunkedWriter(output, args.chunkSize)
+    stats = Stats()
+    workers = args.workers or os.cpu_count()
+
+    try:
+        if workers > 1:
+            args.workers = workers
+            runParallel(args, writer, fields, stats)
+        else:
+            rows = calculateRows(readLines(openInputs(args.inputs), args.chunkSize, stats), args.errors)
+            WRITERS[args.format](rows, writer, fields)
+    except RowError as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 1
+    finally:
+        writer.flush()
+        if output is not sys.stdout:
+            output.close()
+        if args.stats:
+            stats.report(sys.stderr)
+
+    return 0
+
+def main(argv = None) -> int:
+    return run(createArgumentParser().parse_args(argv))
+
+if __name__ == '__main__':
+    sys.exit(main())
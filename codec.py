@@ -0,0 +1,132 @@
+from array import array
+
+# Table driven conversion between dotted text and octets or packed addresses.
+# Parsing is a dictionary lookup per octet, so invalid input never goes through
+# an exception. Invalid octets and addresses parse to -1.
+
+DECIMAL_OCTETS = tuple(format(i, 'd') for i in range(256))
+BINARY_OCTETS = tuple(format(i, '08b') for i in range(256))
+
+DECIMAL_OCTET_BYTES = tuple(octet.encode('ascii') for octet in DECIMAL_OCTETS)
+BINARY_OCTET_BYTES = tuple(octet.encode('ascii') for octet in BINARY_OCTETS)
+
+def _digitStrings(digits:str, maxLength:int) -> []:
+    strings = ['']
+    result = []
+    for _ in range(maxLength):
+        strings = [s + d for s in strings for d in digits]
+        result.extend(strings)
+    return result
+
+# Every 1-3 digit decimal and 1-8 digit binary string, including the ones that
+# parse to values above 255 (the GUI decimal editor accepts up to '999').
+DECIMAL_VALUES = {text: int(text, 10) for text in _digitStrings('0123456789', 3)}
+BINARY_VALUES = {text: int(text, 2) for text in _digitStrings('01', 8)}
+
+# Byte tables only hold valid octets since they are used to build packed addresses
+DECIMAL_BYTE_VALUES = {text.encode('ascii'): value for text, value in DECIMAL_VALUES.items() if value <= 255}
+BINARY_BYTE_VALUES = {text.encode('ascii'): value for text, value in BINARY_VALUES.items()}
+
+# Packed subnet masks and the prefix length they stand for
+_MASK_PREFIXES = {(0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF: prefix for prefix in range(33)}
+
+# Octets
+
+def parseOctet(octet:str, binaryMode = False) -> int:
+    values = BINARY_VALUES if binaryMode else DECIMAL_VALUES
+    value = values.get(octet)
+    if value is None:
+        value = values.get(octet.strip(), -1)
+    return value
+
+def serializeOctet(octet:int, binaryMode = False) -> str:
+    if 0 <= octet <= 255:
+        return BINARY_OCTETS[octet] if binaryMode else DECIMAL_OCTETS[octet]
+
+    if binaryMode:
+        return format(octet, 'b').rjust(8, '0')
+    return format(octet, 'd')
+
+# Octet lists
+
+def parseIpAddress(ipAddress:str, binaryMode = False) -> []:
+    octets = ipAddress.split('.')
+    if len(octets) != 4:
+        return []
+
+    return [parseOctet(octet, binaryMode) for octet in octets]
+
+def serializeIpAddress(ipAddress:[], binaryMode = False) -> str:
+    return '.'.join([serializeOctet(octet, binaryMode) for octet in ipAddress])
+
+# Packed addresses
+
+def parseAddress(ipAddress:bytes, binaryMode = False) -> int:
+    values = BINARY_BYTE_VALUES if binaryMode else DECIMAL_BYTE_VALUES
+    octets = ipAddress.strip().split(b'.')
+    if len(octets) != 4:
+        return -1
+
+    a = values.get(octets[0], -1)
+    b = values.get(octets[1], -1)
+    c = values.get(octets[2], -1)
+    d = values.get(octets[3], -1)
+    if a < 0 or b < 0 or c < 0 or d < 0:
+        return -1
+
+    return a << 24 | b << 16 | c << 8 | d
+
+def formatAddress(value:int, binaryMode = False) -> str:
+    octets = BINARY_OCTETS if binaryMode else DECIMAL_OCTETS
+    return f'{octets[value >> 24]}.{octets[value >> 16 & 0xFF]}.{octets[value >> 8 & 0xFF]}.{octets[value & 0xFF]}'
+
+def encodeAddress(value:int, binaryMode = False) -> bytes:
+    octets = BINARY_OCTET_BYTES if binaryMode else DECIMAL_OCTET_BYTES
+    return b'.'.join((octets[value >> 24], octets[value >> 16 & 0xFF], octets[value >> 8 & 0xFF], octets[value & 0xFF]))
+
+# Buffers of newline separated addresses
+
+def decodeAddresses(buffer:bytes, binaryMode = False) -> array:
+    lines = buffer.split(b'\n')
+    if lines and not lines[-1].strip():
+        lines.pop()
+
+    return array('q', [parseAddress(line, binaryMode) for line in lines])
+
+def encodeAddresses(values, binaryMode = False) -> bytes:
+    octets = BINARY_OCTET_BYTES if binaryMode else DECIMAL_OCTET_BYTES
+    if len(values) == 0:
+        return b''
+
+    return b'\n'.join([
+        b'%s.%s.%s.%s' % (octets[v >> 24], octets[v >> 16 & 0xFF], octets[v >> 8 & 0xFF], octets[v & 0xFF])
+        for v in values]) + b'\n'
+
+def decodeNetworks(buffer:bytes, defaultPrefix = 32) -> tuple[array, array]:
+    # Newline separated "ip/prefix", "ip/mask" or bare "ip" lines. Returns
+    # packed addresses and prefix lengths, both -1 for invalid lines.
+    lines = buffer.split(b'\n')
+    if lines and not lines[-1].strip():
+        lines.pop()
+
+    addresses = array('q', bytes(8 * len(lines)))
+    prefixes = array('b', bytes(len(lines)))
+    for i, line in enumerate(lines):
+        address, separator, mask = line.partition(b'/')
+        packed = parseAddress(address)
+
+        if not separator:
+            prefix = defaultPrefix
+        elif b'.' in mask:
+            prefix = _MASK_PREFIXES.get(parseAddress(mask), -1)
+        else:
+            prefix = DECIMAL_BYTE_VALUES.get(mask.strip(), -1)
+            if prefix > 32:
+                prefix = -1
+
+        if packed == -1 or prefix == -1:
+            packed = prefix = -1
+        addresses[i] = packed
+        prefixes[i] = prefix
+
+    return addresses, prefixes
@@ -0,0 +1,224 @@
+import argparse
+import mmap
+import os
+import shutil
+import struct
+import sys
+
+import numpy as np
+
+import aggregate
+import codec
+import core
+
+# Packed columnar files, so a dataset is parsed from text once and every
+# later run maps it straight into numpy. Layout, all little endian:
+#
+#   header    magic, version, flags, row count, index stride and the offset
+#             of each section, padded to 64 bytes
+#   addresses uint32 per row
+#   prefixes  uint8 per row
+#   index     uint32 every stride rows, only when the addresses are sorted
+#
+# Sections start on 64 byte boundaries. The sorted flag and the sparse index
+# are set by the writer when the rows it was given happen to be in order.
+
+MAGIC = b'IPCF'
+VERSION = 1
+
+FLAG_SORTED = 1
+
+ALIGNMENT = 64
+DEFAULT_INDEX_STRIDE = 4096
+
+_HEADER = struct.Struct('<4sBBHQIQQQ')
+
+def _aligned(offset:int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def isColumnFile(path:str) -> bool:
+    with open(path, 'rb') as stream:
+        return stream.read(len(MAGIC)) == MAGIC
+
+class ColumnWriter:
+    # Rows are appended in chunks; the addresses go straight to the output and
+    # the prefixes to a side file that is copied in behind them on close.
+    def __init__(self, path:str, indexStride = DEFAULT_INDEX_STRIDE):
+        if indexStride < 1:
+            raise ValueError('index stride must be positive')
+
+        self.path = path
+        self.indexStride = indexStride
+        self.count = 0
+        self.sorted = True
+
+        self._last = -1
+        self._index = []
+        self._temporary = path + '.tmp'
+        self._stream = open(self._temporary, 'wb')
+        self._stream.write(bytes(_aligned(_HEADER.size)))
+        self._prefixStream = open(path + '.prefixes.tmp', 'w+b')
+
+    def write(self, addresses, prefixes):
+        addresses = np.asarray(addresses, dtype='<u4').ravel()
+        prefixes = np.asarray(prefixes).ravel()
+        if len(addresses) != len(prefixes):
+            raise ValueError('addresses and prefixes must have the same length')
+        if prefixes.size and (prefixes.min() < 0 or prefixes.max() > 32):
+            raise ValueError('prefix lengths must be between 0 and 32')
+        if not len(addresses):
+            return
+
+        if self.sorted:
+            self.sorted = int(addresses[0]) >= self._last and bool(np.all(addresses[1:] >= addresses[:-1]))
+            self._last = int(addresses[-1])
+        if self.sorted:
+            # Rows at multiples of the stride that fall inside this chunk
+            first = -self.count % self.indexStride
+            self._index.append(addresses[first::self.indexStride].copy())
+
+        self._stream.write(addresses.tobytes())
+        self._prefixStream.write(prefixes.astype(np.uint8).tobytes())
+        self.count += len(addresses)
+
+    def close(self):
+        stream = self._stream
+        prefixOffset = _aligned(stream.tell())
+        stream.write(bytes(prefixOffset - stream.tell()))
+
+        self._prefixStream.seek(0)
+        shutil.copyfileobj(self._prefixStream, stream)
+        self._prefixStream.close()
+        os.remove(self._prefixStream.name)
+
+        flags = 0
+        indexOffset = 0
+        indexStride = 0
+        if self.sorted:
+            flags |= FLAG_SORTED
+            indexStride = self.indexStride
+            indexOffset = _aligned(stream.tell())
+            stream.write(bytes(indexOffset - stream.tell()))
+            for part in self._index:
+                stream.write(part.tobytes())
+
+        stream.seek(0)
+        stream.write(_HEADER.pack(MAGIC, VERSION, flags, 0, self.count, indexStride,
+                                  _aligned(_HEADER.size), prefixOffset, indexOffset))
+        stream.close()
+        os.replace(self._temporary, self.path)
+
+    def abort(self):
+        for stream in (self._stream, self._prefixStream):
+            stream.close()
+            os.remove(stream.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, exc, traceback):
+        if excType is None:
+            self.close()
+        else:
+            self.abort()
+
+class ColumnFile:
+    # Read only, the columns are numpy views on the mapped file and nothing is copied
+    def __init__(self, path:str):
+        with open(path, 'rb') as stream:
+            self._map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, flags, _, count, indexStride, addressOffset, prefixOffset, indexOffset = _HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            magic = version = None
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f'{path} is not an address column file')
+
+        self.path = path
+        self.sorted = bool(flags & FLAG_SORTED)
+        self.indexStride = indexStride
+        self.addresses = np.frombuffer(self._map, dtype='<u4', count=count, offset=addressOffset)
+        self.prefixes = np.frombuffer(self._map, dtype=np.uint8, count=count, offset=prefixOffset)
+        self.index = None
+        if self.sorted and count:
+            self.index = np.frombuffer(self._map, dtype='<u4', count=(count + indexStride - 1) // indexStride, offset=indexOffset)
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def chunks(self, rows = aggregate.DEFAULT_CHUNK_SIZE):
+        # (addresses, prefixes) views of at most rows rows, to keep the intermediates of batch calculations bounded
+        for start in range(0, len(self.addresses), rows):
+            yield self.addresses[start:start + rows], self.prefixes[start:start + rows]
+
+    def searchRange(self, low:int, high:int) -> tuple[int, int]:
+        # Rows with low <= address <= high, only for sorted files. The sparse
+        # index narrows the search to a stride before the mapped column is read.
+        if not self.sorted:
+            raise ValueError('range search needs a sorted file')
+        if self.index is None:
+            return 0, 0
+
+        return self._position(low, 'left'), self._position(high, 'right')
+
+    def select(self, network:int, prefix:int) -> tuple[np.ndarray, np.ndarray]:
+        start, stop = self.searchRange(network & core.PREFIX_MASKS[prefix], network | core.HOST_MASKS[prefix])
+        return self.addresses[start:stop], self.prefixes[start:stop]
+
+    def _position(self, value:int, side:str) -> int:
+        stride = self.indexStride
+        block = int(np.searchsorted(self.index, value, side))
+        start = max(block - 1, 0) * stride
+        stop = min(block * stride + 1, len(self.addresses))
+        return start + int(np.searchsorted(self.addresses[start:stop], value, side))
+
+    def close(self):
+        # A map cannot be closed while views of it are alive. Views handed out
+        # to the caller keep it open until they are released.
+        self.addresses = self.prefixes = self.index = None
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, exc, traceback):
+        self.close()
+
+def convertText(streams, path:str, chunkSize = aggregate.DEFAULT_CHUNK_SIZE, indexStride = DEFAULT_INDEX_STRIDE) -> tuple[int, int, bool]:
+    # Lines as read by codec.decodeNetworks, returns (rows, invalid lines, sorted)
+    invalid = 0
+    with ColumnWriter(path, indexStride) as writer:
+        for stream in streams:
+            for chunk in aggregate.readChunks(stream, chunkSize):
+                addresses, prefixes = codec.decodeNetworks(chunk)
+                addresses = np.frombuffer(addresses, dtype=np.int64)
+                valid = addresses >= 0
+                invalid += len(valid) - int(np.count_nonzero(valid))
+                writer.write(addresses[valid], np.frombuffer(prefixes, dtype=np.int8)[valid])
+
+    return writer.count, invalid, writer.sorted
+
+def main(argv = None) -> int:
+    parser = argparse.ArgumentParser(description='Convert address text to a packed column file.')
+    parser.add_argument('inputs', nargs='*', help='files with one "ip/prefix", "ip/mask" or address per line, stdin when omitted or "-"')
+    parser.add_argument('-o', '--output', required=True, help='column file to write')
+    parser.add_argument('--index-stride', dest='indexStride', type=int, default=DEFAULT_INDEX_STRIDE,
+                        help='rows per sparse index entry when the input is sorted')
+    parser.add_argument('--chunk-size', dest='chunkSize', type=int, default=aggregate.DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    try:
+        rows, invalid, isSorted = convertText(aggregate.openInputs(args.inputs), args.output, args.chunkSize, args.indexStride)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f'{rows} rows{" (sorted)" if isSorted else ""}, {invalid} invalid lines skipped', file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,49 +1,19 @@
-import math
+import codec
+import instrument
 
 # Parsing and conversion
 
 def parseOctet(octet:str, binaryMode = False) -> int:
-    base = 10
-    if binaryMode:
-        base = 2
-
-    try:
-        parsed = int(octet, base)
-        return parsed
-    except ValueError:
-        return -1
+    return codec.parseOctet(octet, binaryMode)
 
 def parseIpAddress(ipAddress: str, binaryMode = False) -> []:
-    octets = ipAddress.split('.')
-    if len(octets) != 4:
-        return []
-
-    for i in range(4):
-        octets[i] = parseOctet(octets[i], binaryMode)
-
-    return octets
+    return codec.parseIpAddress(ipAddress, binaryMode)
 
 def serializeOctet(octet:int, binaryMode = False) -> str:
-    fmt = 'd'
-    if binaryMode:
-        fmt = 'b'
-
-    formatted = format(octet, fmt)
-
-    if binaryMode:
-        filler = ''
-        for i in range(8 - len(formatted)):
-            filler = filler + '0'
-
-        formatted = filler + formatted
-
-    return formatted
+    return codec.serializeOctet(octet, binaryMode)
 
 def serializeIpAddress(ipAddress: [], binaryMode = False) -> str:
-    for i in ipAddress:
-        ipAddress[i] = serializeOctet(i, binaryMode)
-
-    return '.'.join(ipAddress)
+    return codec.serializeIpAddress(ipAddress, binaryMode)
 
 # Validation
 
@@ -62,51 +32,24 @@ def isValidIpAddress(ipAddress:[]) -> bool:
 
     return isValid
 
+SUBNET_OCTET_BITS = {255: 8, 254: 7, 252: 6, 248: 5, 240: 4, 224: 3, 192: 2, 128: 1, 0: 0}
+
 def isValidSubnetOctet(octet:int) -> bool:
-    return octet in [255, 254, 252, 248, 240, 224, 192, 128, 0]
+    return octet in SUBNET_OCTET_BITS
 
 def isValidSubnetMask(subnetMask:[]) -> bool:
-    if len(subnetMask) != 4:
-        return False
-
-    isValid = True
-    prevOctet = 255 #Fake initial value to make the loop work
-
-    for i in range(4):
-        currentOctet = subnetMask[i]
-        currentNetworkBits = networkBitsInOctetValue(currentOctet)
-
-        if not isValidSubnetOctet(currentOctet) or currentNetworkBits > 0 and prevOctet != 255:
-            isValid = False
-            break
-        prevOctet = currentOctet
-
-    return isValid
+    return isValidIpAddress(subnetMask) and prefixFromMask(packIpAddress(subnetMask)) != -1
 
 # Address calculations
 
 def networkBitsInOctetValue(octetValue:int) -> int:
-    if octetValue not in [255, 254, 252, 248, 240, 224, 192, 128, 0]:
-        return -1
-
-    return int(8 - math.log(256 - octetValue) / math.log(2))
+    return SUBNET_OCTET_BITS.get(octetValue, -1)
 
 def networkBitsInSubnetMask(subnetMask:[]) -> int:
-    prevOctet = 255  # Fake initial value to make the loop work
-    networkBits = 0
-
-    for i in range(4):
-        currentOctet = subnetMask[i]
-        currentNetworkBits = networkBitsInOctetValue(currentOctet)
-
-        if currentNetworkBits == -1 or currentNetworkBits > 0 and prevOctet != 255:
-            networkBits = -1
-            break
-
-        networkBits += currentNetworkBits
-        prevOctet = currentOctet
+    if not isValidIpAddress(subnetMask[:4]):
+        return -1
 
-    return networkBits
+    return prefixFromMask(packIpAddress(subnetMask))
 
 def networkBitsToOctetValue(networkBits:int) -> int:
     if networkBits < 0 or networkBits > 8:
@@ -118,67 +61,188 @@ def calculateSubnetMaskFromShortMask(shortMask:int) -> []:
     if shortMask < 0 or shortMask > 32:
         return []
 
-    mask = []
-    fullOctets = int(shortMask / 8)
-    lastOctetBits = shortMask % 8
+    return unpackIpAddress(PREFIX_MASKS[shortMask])
 
-    for i in range(fullOctets):
-        mask.append(255)
+def hostBitsForHosts(hostsNum:int) -> int:
+    # Smallest number of host bits whose network fits hostsNum devices plus
+    # the network and broadcast addresses
+    if hostsNum < 0:
+        return -1
 
-    mask.append(networkBitsToOctetValue(lastOctetBits))
+    return (hostsNum + 1).bit_length()
 
-    for i in range(4-fullOctets):
-        mask.append(0)
+def calculateNetworkAddress(ip:[], subnet:[]) -> []:
+    return unpackIpAddress(packIpAddress(ip) & packIpAddress(subnet))
 
-    return mask
+def calculateBroadcastAddress(ip:[], subnet:[]) -> []:
+    return unpackIpAddress(packIpAddress(ip) | (packIpAddress(subnet) ^ ALL_ONES))
 
-def calculateNetworkAddress(ip:[], subnet:[]) -> []:
-    networkAddress = []
-    for i in range(4):
-        networkAddress.append(ip[i] & subnet[i])
+def calculateFirstAndLastAddress(networkAddress:[], broadcastAddress:[]) -> tuple[[], []]:
+    firstAddress = (packIpAddress(networkAddress) + 1) & ALL_ONES
+    lastAddress = (packIpAddress(broadcastAddress) - 1) & ALL_ONES
 
-    return networkAddress
+    return unpackIpAddress(firstAddress), unpackIpAddress(lastAddress)
 
-def calculateBroadcastAddress(ip:[], subnet:[]) -> []:
-    broadcastAddress = []
-    for i in range(4):
-        broadcastAddress.append(ip[i] | (255 - subnet[i]))
+def calculateAddressRange(lowerAddress:[], higherAddress:[]) -> int:
+    return packIpAddress(higherAddress) - packIpAddress(lowerAddress) + 1
 
-    return broadcastAddress
+# Packed addresses
+#
+# An address is held as a single unsigned 32 bit integer. The list based
+# functions above are adapters around these, kept for the GUI.
 
-def calculateFirstAndLastAddress(networkAddress:[], broadcastAddress:[]) -> tuple[[], []]:
-    networkAddressNum = (
-            networkAddress[0] << 24
-            | networkAddress[1] << 16
-            | networkAddress[2] << 8
-            | networkAddress[3])
+ALL_ONES = 0xFFFFFFFF
 
-    firstAddressNum = networkAddressNum + 1
+PREFIX_MASKS = tuple((ALL_ONES << (32 - prefix)) & ALL_ONES for prefix in range(33))
+HOST_MASKS = tuple(mask ^ ALL_ONES for mask in PREFIX_MASKS)
 
-    firstAddress = []
-    firstAddress.append(firstAddressNum >> 24 & 0xFF)
-    firstAddress.append(firstAddressNum >> 16 & 0xFF)
-    firstAddress.append(firstAddressNum >> 8 & 0xFF)
-    firstAddress.append(firstAddressNum & 0xFF)
+def packIpAddress(ipAddress:[]) -> int:
+    return ((ipAddress[0] & 0xFF) << 24
+            | (ipAddress[1] & 0xFF) << 16
+            | (ipAddress[2] & 0xFF) << 8
+            | (ipAddress[3] & 0xFF))
 
-    broadcastAddressNum = (
-            broadcastAddress[0] << 24
-            | broadcastAddress[1] << 16
-            | broadcastAddress[2] << 8
-            | broadcastAddress[3])
+def unpackIpAddress(value:int) -> []:
+    return [value >> 24 & 0xFF, value >> 16 & 0xFF, value >> 8 & 0xFF, value & 0xFF]
 
-    lastAddressNum = broadcastAddressNum - 1
+def prefixFromMask(mask:int) -> int:
+    hostBits = mask ^ ALL_ONES
+    if hostBits & (hostBits + 1):
+        return -1 # Not a contiguous mask
 
-    lastAddress = []
-    lastAddress.append(lastAddressNum >> 24 & 0xFF)
-    lastAddress.append(lastAddressNum >> 16 & 0xFF)
-    lastAddress.append(lastAddressNum >> 8 & 0xFF)
-    lastAddress.append(lastAddressNum & 0xFF)
+    return 32 - hostBits.bit_length()
+
+class IPv4Address:
+    __slots__ = ('_value',)
 
-    return firstAddress, lastAddress
+    def __init__(self, value:int):
+        if value < 0 or value > ALL_ONES:
+            raise ValueError(f'{value} is not a 32 bit address')
+        object.__setattr__(self, '_value', value)
 
-def calculateAddressRange(lowerAddress:[], higherAddress:[]) -> int:
-    firstAddress = (lowerAddress[0] << 24 | lowerAddress[1] << 16 | lowerAddress[2] << 8 | lowerAddress[3])
-    lastAddress = (higherAddress[0] << 24 | higherAddress[1] << 16 | higherAddress[2] << 8 | higherAddress[3])
+    @classmethod
+    def fromOctets(cls, octets:[]):
+        if not isValidIpAddress(octets):
+            raise ValueError(f'{octets} is not a valid IP address')
+        return cls(packIpAddress(octets))
+
+    @classmethod
+    def fromString(cls, text:str, binaryMode = False):
+        return cls.fromOctets(parseIpAddress(text, binaryMode))
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def octets(self) -> []:
+        return unpackIpAddress(self._value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __int__(self):
+        return self._value
+
+    def __index__(self):
+        return self._value
+
+    def __eq__(self, other):
+        if not isinstance(other, IPv4Address):
+            return NotImplemented
+        return self._value == other._value
+
+    def __lt__(self, other):
+        if not isinstance(other, IPv4Address):
+            return NotImplemented
+        return self._value < other._value
+
+    def __hash__(self):
+        return hash(self._value)
+
+    def __str__(self):
+        return '.'.join(str(octet) for octet in unpackIpAddress(self._value))
+
+    def __repr__(self):
+        return f"IPv4Address('{self}')"
+
+class IPv4Network:
+    __slots__ = ('_network', '_prefix')
+
+    def __init__(self, address:int, prefix:int):
+        if prefix < 0 or prefix > 32:
+            raise ValueError(f'{prefix} is not a valid prefix length')
+        if address < 0 or address > ALL_ONES:
+            raise ValueError(f'{address} is not a 32 bit address')
+        object.__setattr__(self, '_network', address & PREFIX_MASKS[prefix])
+        object.__setattr__(self, '_prefix', prefix)
+
+    @classmethod
+    def fromString(cls, text:str):
+        address, _, prefix = text.partition('/')
+        return cls(IPv4Address.fromString(address).value, int(prefix) if prefix else 32)
+
+    @classmethod
+    def fromMask(cls, address:int, mask:int):
+        prefix = prefixFromMask(mask)
+        if prefix == -1:
+            raise ValueError(f'{mask:#010x} is not a valid subnet mask')
+        return cls(address, prefix)
+
+    @property
+    def prefix(self) -> int:
+        return self._prefix
+
+    @property
+    def mask(self) -> int:
+        return PREFIX_MASKS[self._prefix]
+
+    @property
+    def networkAddress(self) -> int:
+        return self._network
+
+    @property
+    def broadcastAddress(self) -> int:
+        return self._network | HOST_MASKS[self._prefix]
+
+    # First and last wrap around the address space for /32, like calculateFirstAndLastAddress
+    @property
+    def firstAddress(self) -> int:
+        return (self._network + 1) & ALL_ONES
+
+    @property
+    def lastAddress(self) -> int:
+        return ((self._network | HOST_MASKS[self._prefix]) - 1) & ALL_ONES
+
+    @property
+    def size(self) -> int:
+        return HOST_MASKS[self._prefix] + 1
+
+    def contains(self, address:int) -> bool:
+        return address & PREFIX_MASKS[self._prefix] == self._network
+
+    def __contains__(self, address):
+        return self.contains(int(address))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __eq__(self, other):
+        if not isinstance(other, IPv4Network):
+            return NotImplemented
+        return self._network == other._network and self._prefix == other._prefix
+
+    def __lt__(self, other):
+        if not isinstance(other, IPv4Network):
+            return NotImplemented
+        return (self._network, self._prefix) < (other._network, other._prefix)
+
+    def __hash__(self):
+        return hash((self._network, self._prefix))
+
+    def __str__(self):
+        return f'{IPv4Address(self._network)}/{self._prefix}'
+
+    def __repr__(self):
+        return f"IPv4Network('{self}')"
 
-    return lastAddress - firstAddress + 1
\ No newline at end of file
+instrument.instrumentFunctions(globals(), __name__)
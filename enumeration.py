@@ -0,0 +1,107 @@
+import collections.abc
+
+import core
+
+# Lazy, sequence like views over the hosts of a network or the subnets it
+# splits into. A view is backed by a range of packed addresses, so length,
+# indexing, slicing, reversal, index() and membership are all O(1) and
+# nothing is allocated until an item is read.
+
+class AddressView(collections.abc.Sequence):
+    __slots__ = ('_values',)
+
+    def __init__(self, values:range):
+        self._values = values
+
+    @property
+    def values(self) -> range:
+        return self._values
+
+    def _item(self, value:int):
+        return core.IPv4Address(value)
+
+    def _value(self, item) -> int:
+        return int(item)
+
+    def _withValues(self, values:range):
+        view = object.__new__(type(self))
+        view._values = values
+        return view
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._withValues(self._values[index])
+        return self._item(self._values[index])
+
+    def __iter__(self):
+        return map(self._item, self._values)
+
+    def __reversed__(self):
+        return map(self._item, reversed(self._values))
+
+    def __contains__(self, item):
+        value = self._value(item)
+        return value is not None and value in self._values
+
+    def index(self, item, start = 0, stop = None):
+        value = self._value(item)
+        if value is None or value not in self._values:
+            raise ValueError(f'{item!r} is not in the view')
+
+        position = self._values.index(value)
+        if position < start or (stop is not None and position >= stop):
+            raise ValueError(f'{item!r} is not in the view')
+        return position
+
+    def count(self, item):
+        return 1 if item in self else 0
+
+    def __eq__(self, other):
+        if not isinstance(other, AddressView) or type(self) is not type(other):
+            return NotImplemented
+        return self._values == other._values
+
+    def __repr__(self):
+        return f'{type(self).__name__}({len(self)} items)'
+
+class HostsView(AddressView):
+    __slots__ = ()
+
+class SubnetsView(AddressView):
+    __slots__ = ('_prefix',)
+
+    def __init__(self, values:range, prefix:int):
+        super().__init__(values)
+        self._prefix = prefix
+
+    @property
+    def prefix(self) -> int:
+        return self._prefix
+
+    def _item(self, value:int):
+        return core.IPv4Network(value, self._prefix)
+
+    def _value(self, item):
+        if isinstance(item, core.IPv4Network):
+            return item.networkAddress if item.prefix == self._prefix else None
+        return int(item)
+
+    def _withValues(self, values:range):
+        view = super()._withValues(values)
+        view._prefix = self._prefix
+        return view
+
+def hosts(network:core.IPv4Network) -> HostsView:
+    # Same range calculateFirstAndLastAddress gives, /31 and /32 have no hosts
+    if network.prefix >= 31:
+        return HostsView(range(0))
+    return HostsView(range(network.networkAddress + 1, network.broadcastAddress))
+
+def subnets(network:core.IPv4Network, prefix:int) -> SubnetsView:
+    if prefix < network.prefix or prefix > 32:
+        raise ValueError(f'cannot split /{network.prefix} into /{prefix} subnets')
+
+    return SubnetsView(range(network.networkAddress, network.broadcastAddress + 1, core.HOST_MASKS[prefix] + 1), prefix)
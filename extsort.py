@@ -0,0 +1,232 @@
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+import addressset
+import aggregate
+import codec
+import columns
+import core
+
+# Sorting address lists that do not fit in memory. Input is cut into runs
+# of a bounded number of addresses, each run is sorted in memory and spilled
+# to a temporary file of raw uint32 values, and the runs are merged back a
+# block at a time. Every stage is a generator of sorted uint32 arrays, so
+# memory stays at one run while sorting and one block per run while merging.
+#
+# The merge never compares single values in Python: each round it emits
+# everything up to the smallest last value among the buffered blocks, since
+# nothing still on disk can sort before that.
+
+DEFAULT_RUN_SIZE = 1 << 26 # Addresses per sorted run, 256 MiB of uint32
+DEFAULT_BLOCK_SIZE = 1 << 20 # Addresses read from each run per merge round
+
+def spillRuns(chunks, directory:str, runSize = DEFAULT_RUN_SIZE) -> []:
+    # Sorts and writes runs of at most runSize addresses, returns their paths
+    paths = []
+    buffered = []
+    count = 0
+
+    def flush():
+        run = np.sort(np.concatenate(buffered))
+        path = os.path.join(directory, f'run{len(paths):06d}.u32')
+        run.astype('<u4').tofile(path)
+        paths.append(path)
+
+    for chunk in chunks:
+        chunk = np.asarray(chunk, dtype=np.uint32).ravel()
+        while len(chunk):
+            taken = chunk[:runSize - count]
+            chunk = chunk[len(taken):]
+            buffered.append(taken)
+            count += len(taken)
+            if count == runSize:
+                flush()
+                buffered = []
+                count = 0
+
+    if count:
+        flush()
+    return paths
+
+def _readBlocks(path:str, blockSize:int):
+    with open(path, 'rb') as stream:
+        while True:
+            block = np.fromfile(stream, dtype='<u4', count=blockSize)
+            if not len(block):
+                return
+            yield block.astype(np.uint32, copy=False)
+
+def mergeRuns(paths:[], blockSize = DEFAULT_BLOCK_SIZE):
+    readers = [_readBlocks(path, blockSize) for path in paths]
+    buffers = []
+    for reader in readers:
+        block = next(reader, None)
+        if block is not None:
+            buffers.append([block, reader])
+
+    while buffers:
+        # Everything up to the smallest buffered maximum is final
+        bound = min(int(block[-1]) for block, _ in buffers)
+
+        parts = []
+        for entry in buffers:
+            block = entry[0]
+            cut = int(np.searchsorted(block, bound, side='right'))
+            parts.append(block[:cut])
+            entry[0] = block[cut:]
+
+        yield np.sort(np.concatenate(parts)) if len(parts) > 1 else parts[0]
+
+        remaining = []
+        for entry in buffers:
+            if not len(entry[0]):
+                entry[0] = next(entry[1], None)
+            if entry[0] is not None:
+                remaining.append(entry)
+        buffers = remaining
+
+def dedupe(blocks):
+    # Drops repeated values from a sorted stream, also across block boundaries
+    last = -1
+    for block in blocks:
+        if not len(block):
+            continue
+
+        keep = np.empty(len(block), dtype=bool)
+        keep[0] = int(block[0]) != last
+        np.not_equal(block[1:], block[:-1], out=keep[1:])
+        last = int(block[-1])
+
+        block = block[keep]
+        if len(block):
+            yield block
+
+def maskBlocks(blocks, prefix:int):
+    # Network address of every value at the given prefix length, order is kept
+    mask = np.uint32(core.PREFIX_MASKS[prefix])
+    for block in blocks:
+        yield block & mask
+
+def collapse(blocks, prefix = 32):
+    # Sorted, unique /prefix networks to the fewest CIDR blocks covering the
+    # same addresses. Yields (networks, prefixes) array pairs.
+    step = core.HOST_MASKS[prefix] + 1
+    runStart = runEnd = None
+
+    def networksFor(start:int, end:int):
+        return addressset.rangeToNetworks(start, end + core.HOST_MASKS[prefix])
+
+    for block in blocks:
+        if not len(block):
+            continue
+
+        values = block.astype(np.int64)
+        # Positions where the next network does not directly follow the previous one
+        breaks = np.flatnonzero(values[1:] != values[:-1] + step)
+        starts = np.concatenate(([0], breaks + 1))
+        ends = np.concatenate((breaks, [len(values) - 1]))
+
+        ranges = list(zip(values[starts].tolist(), values[ends].tolist()))
+        if runStart is not None:
+            if ranges[0][0] == runEnd + step:
+                ranges[0] = (runStart, ranges[0][1])
+            else:
+                ranges.insert(0, (runStart, runEnd))
+        # The last run may continue in the next block
+        runStart, runEnd = ranges.pop()
+
+        if ranges:
+            networks = [network for start, end in ranges for network in networksFor(start, end)]
+            yield (np.array([network for network, _ in networks], dtype=np.uint32),
+                   np.array([networkPrefix for _, networkPrefix in networks], dtype=np.uint8))
+
+    if runStart is not None:
+        networks = networksFor(runStart, runEnd)
+        yield (np.array([network for network, _ in networks], dtype=np.uint32),
+               np.array([networkPrefix for _, networkPrefix in networks], dtype=np.uint8))
+
+def sortAddresses(chunks, directory:str, runSize = DEFAULT_RUN_SIZE, blockSize = DEFAULT_BLOCK_SIZE,
+                  unique = False, prefix = 32):
+    # The whole pipeline up to the merged stream, directory holds the spilled runs
+    if prefix < 0 or prefix > 32:
+        raise ValueError(f'{prefix} is not a valid prefix length')
+    if prefix < 32:
+        chunks = maskBlocks(chunks, prefix)
+
+    blocks = mergeRuns(spillRuns(chunks, directory, runSize), blockSize)
+    return dedupe(blocks) if unique else blocks
+
+def readAddressChunks(paths:[], counts:dict, chunkSize = aggregate.DEFAULT_CHUNK_SIZE):
+    # uint32 chunks from text files (invalid lines counted and skipped) or column files
+    for path in paths or ['-']:
+        if path != '-' and columns.isColumnFile(path):
+            with columns.ColumnFile(path) as columnFile:
+                for addresses, _ in columnFile.chunks(chunkSize):
+                    yield addresses
+            continue
+
+        for stream in aggregate.openInputs([path]):
+            for chunk in aggregate.readChunks(stream, chunkSize):
+                decoded = np.frombuffer(codec.decodeAddresses(chunk), dtype=np.int64)
+                valid = decoded >= 0
+                counts['invalid'] = counts.get('invalid', 0) + len(decoded) - int(np.count_nonzero(valid))
+                yield decoded[valid].astype(np.uint32)
+
+def main(argv = None) -> int:
+    parser = argparse.ArgumentParser(description='Sort, dedupe and collapse address lists larger than memory.')
+    parser.add_argument('inputs', nargs='*', help='text files with one address per line or column files, stdin when omitted or "-"')
+    parser.add_argument('-o', '--output', help='output file, stdout when omitted')
+    parser.add_argument('-f', '--format', choices=('text', 'columns'), default='text',
+                        help='text lines or a column file, which is flagged as sorted (needs -o)')
+    parser.add_argument('-u', '--unique', action='store_true', help='drop duplicate addresses')
+    parser.add_argument('-p', '--prefix', type=int, default=32, help='replace every address by its network at this prefix length')
+    parser.add_argument('--collapse', action='store_true', help='merge the sorted networks into the fewest CIDR blocks')
+    parser.add_argument('--run-size', dest='runSize', type=int, default=DEFAULT_RUN_SIZE, help='addresses per in-memory run')
+    parser.add_argument('--temp-dir', dest='tempDir', help='where sorted runs are spilled')
+    args = parser.parse_args(argv)
+
+    if args.format == 'columns' and not args.output:
+        parser.error('--format columns needs --output')
+
+    counts = {}
+    with tempfile.TemporaryDirectory(prefix='ipsort', dir=args.tempDir) as directory:
+        try:
+            blocks = sortAddresses(readAddressChunks(args.inputs, counts), directory, args.runSize,
+                                   unique=args.unique or args.collapse, prefix=args.prefix)
+        except ValueError as e:
+            parser.error(str(e))
+
+        if args.collapse:
+            pairs = collapse(blocks, args.prefix)
+        else:
+            pairs = ((block, np.full(len(block), args.prefix, dtype=np.uint8)) for block in blocks)
+
+        rows = 0
+        if args.format == 'columns':
+            with columns.ColumnWriter(args.output) as writer:
+                for addresses, prefixes in pairs:
+                    writer.write(addresses, prefixes)
+                    rows += len(addresses)
+        else:
+            out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+            try:
+                for addresses, prefixes in pairs:
+                    if args.collapse or args.prefix < 32:
+                        out.writelines(b'%s/%d\n' % (codec.encodeAddress(address), prefix)
+                                       for address, prefix in zip(addresses.tolist(), prefixes.tolist()))
+                    else:
+                        out.write(codec.encodeAddresses(addresses.tolist()))
+                    rows += len(addresses)
+            finally:
+                if args.output:
+                    out.close()
+
+    print(f'{rows} rows written, {counts.get("invalid", 0)} invalid lines skipped', file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
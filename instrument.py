@@ -0,0 +1,174 @@
+import atexit
+import functools
+import os
+import time
+
+# Opt-in instrumentation. With IPCALC_INSTRUMENT=1 in the environment the
+# decorated functions count their calls and keep a latency histogram. Without
+# it the decorators return the function unchanged, so there is no overhead at
+# all. IPCALC_INSTRUMENT_OUTPUT=path writes a JSON snapshot at exit.
+#
+# Event to repaint timings are started with mark() and finished by
+# completeMarks(), which the GUI calls on the next paint event.
+
+ENABLED_ENV = 'IPCALC_INSTRUMENT'
+OUTPUT_ENV = 'IPCALC_INSTRUMENT_OUTPUT'
+
+ENABLED = os.environ.get(ENABLED_ENV, '') not in ('', '0')
+
+BUCKETS = 64 # Bucket i holds latencies below 2 ** i nanoseconds
+
+class Stats:
+    __slots__ = ('count', 'totalNs', 'maxNs', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.totalNs = 0
+        self.maxNs = 0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, ns:int):
+        self.count += 1
+        self.totalNs += ns
+        if ns > self.maxNs:
+            self.maxNs = ns
+        self.buckets[min(ns.bit_length(), BUCKETS - 1)] += 1
+
+    def percentileNs(self, fraction:float) -> int:
+        # Upper bound of the bucket holding the percentile
+        threshold = self.count * fraction
+        seen = 0
+        for i, bucket in enumerate(self.buckets):
+            seen += bucket
+            if bucket and seen >= threshold:
+                return 1 << i
+        return 0
+
+    def toDict(self) -> dict:
+        return {
+            'count': self.count,
+            'totalMs': self.totalNs / 1e6,
+            'meanUs': self.totalNs / self.count / 1e3 if self.count else 0.0,
+            'p50Us': self.percentileNs(0.5) / 1e3,
+            'p99Us': self.percentileNs(0.99) / 1e3,
+            'maxUs': self.maxNs / 1e3,
+            'histogram': {f'<{1 << i}ns': bucket for i, bucket in enumerate(self.buckets) if bucket},
+        }
+
+_stats = {}
+_pendingMarks = {}
+
+def stats(name:str) -> Stats:
+    entry = _stats.get(name)
+    if entry is None:
+        entry = _stats[name] = Stats()
+    return entry
+
+def record(name:str, ns:int):
+    stats(name).add(ns)
+
+def timed(name = None):
+    def decorator(function):
+        if not ENABLED:
+            return function
+
+        entry = stats(name or function.__qualname__)
+        clock = time.perf_counter_ns
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                entry.add(clock() - started)
+
+        return wrapper
+    return decorator
+
+def timedSlot(name:str):
+    # Handler latency plus the time until the result is repainted
+    def decorator(function):
+        if not ENABLED:
+            return function
+
+        timedFunction = timed(name)(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            mark(name + '.toRepaint')
+            return timedFunction(*args, **kwargs)
+
+        return wrapper
+    return decorator
+
+def timedResultSlot(name:str, startAttribute = 'markStarted'):
+    # For handlers that only submit work: the click stores startMark() in
+    # startAttribute and the slot that shows the result records the latency
+    # from there, then starts the repaint mark at the same time. A start the
+    # handler reset to 0 (cancelled, superseded) records nothing.
+    def decorator(function):
+        if not ENABLED:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(self, *args, **kwargs):
+            started = getattr(self, startAttribute, 0)
+            setattr(self, startAttribute, 0)
+            try:
+                return function(self, *args, **kwargs)
+            finally:
+                finishMark(name, started)
+
+        return wrapper
+    return decorator
+
+def instrumentFunctions(namespace:dict, module:str):
+    # Wraps every public function defined in module, used by core on import
+    if not ENABLED:
+        return
+
+    for name, value in list(namespace.items()):
+        if callable(value) and not isinstance(value, type) and not name.startswith('_') \
+                and getattr(value, '__module__', None) == module:
+            namespace[name] = timed(f'{module}.{name}')(value)
+
+def mark(name:str):
+    if ENABLED and name not in _pendingMarks:
+        _pendingMarks[name] = time.perf_counter_ns()
+
+def startMark() -> int:
+    return time.perf_counter_ns() if ENABLED else 0
+
+def finishMark(name:str, started:int):
+    # Latency of work started with startMark, and its repaint mark from the same start
+    if ENABLED and started:
+        record(name, time.perf_counter_ns() - started)
+        _pendingMarks.setdefault(name + '.toRepaint', started)
+
+def hasPendingMarks() -> bool:
+    return bool(_pendingMarks)
+
+def completeMarks():
+    now = time.perf_counter_ns()
+    for name, started in _pendingMarks.items():
+        record(name, now - started)
+    _pendingMarks.clear()
+
+def snapshot() -> dict:
+    return {name: entry.toDict() for name, entry in sorted(_stats.items()) if entry.count}
+
+def writeSnapshot(path:str):
+    import json # Only needed here, kept out of the import of core
+
+    with open(path, 'w', encoding='utf-8') as stream:
+        json.dump(snapshot(), stream, indent=2)
+
+def reset():
+    # Entries are kept since the wrappers hold on to them
+    for entry in _stats.values():
+        entry.__init__()
+    _pendingMarks.clear()
+
+if ENABLED and os.environ.get(OUTPUT_ENV):
+    atexit.register(lambda: writeSnapshot(os.environ[OUTPUT_ENV]))
@@ -0,0 +1,224 @@
+import codec
+
+# IPv6 addresses held as a single unsigned 128 bit integer. Parsing follows the
+# codec convention: invalid text parses to -1 instead of raising.
+
+ALL_ONES = (1 << 128) - 1
+
+PREFIX_MASKS = tuple((ALL_ONES << (128 - prefix)) & ALL_ONES for prefix in range(129))
+HOST_MASKS = tuple(mask ^ ALL_ONES for mask in PREFIX_MASKS)
+
+_HEX_DIGITS = frozenset('0123456789abcdefABCDEF')
+
+def _parseHextets(groups:[]) -> []:
+    hextets = []
+    for group in groups:
+        if not group or len(group) > 4 or not _HEX_DIGITS.issuperset(group):
+            return None
+        hextets.append(int(group, 16))
+    return hextets
+
+def parseIpv6Address(ipAddress:str) -> int:
+    text = ipAddress.strip()
+
+    # An embedded IPv4 address takes the place of the last two hextets
+    tail = []
+    if '.' in text:
+        head, _, ipv4 = text.rpartition(':')
+        packed = codec.parseAddress(ipv4.encode('ascii', 'replace'))
+        if packed == -1 or not head:
+            return -1
+        tail = [packed >> 16, packed & 0xFFFF]
+        text = head + ':' if head.endswith(':') else head
+
+    if text.count('::') > 1:
+        return -1
+
+    if '::' in text:
+        left, _, right = text.partition('::')
+        leftHextets = _parseHextets(left.split(':')) if left else []
+        rightHextets = _parseHextets(right.split(':')) if right else []
+        if leftHextets is None or rightHextets is None:
+            return -1
+
+        missing = 8 - len(leftHextets) - len(rightHextets) - len(tail)
+        if missing < 1:
+            return -1
+        hextets = leftHextets + [0] * missing + rightHextets + tail
+    else:
+        hextets = _parseHextets(text.split(':'))
+        if hextets is None:
+            return -1
+        hextets += tail
+        if len(hextets) != 8:
+            return -1
+
+    value = 0
+    for hextet in hextets:
+        value = value << 16 | hextet
+    return value
+
+def serializeIpv6Address(value:int) -> str:
+    hextets = [value >> shift & 0xFFFF for shift in range(112, -16, -16)]
+
+    # RFC 5952: compress the longest run of two or more zero hextets, the first one on ties
+    bestStart = -1
+    bestLength = 1
+    runStart = -1
+    for i, hextet in enumerate(hextets + [1]):
+        if hextet == 0:
+            if runStart == -1:
+                runStart = i
+        elif runStart != -1:
+            if i - runStart > bestLength:
+                bestStart = runStart
+                bestLength = i - runStart
+            runStart = -1
+
+    if bestStart == -1:
+        return ':'.join(format(hextet, 'x') for hextet in hextets)
+
+    left = ':'.join(format(hextet, 'x') for hextet in hextets[:bestStart])
+    right = ':'.join(format(hextet, 'x') for hextet in hextets[bestStart + bestLength:])
+    return f'{left}::{right}'
+
+def parseIpv6Network(network:str) -> tuple[int, int]:
+    address, separator, prefix = network.partition('/')
+    value = parseIpv6Address(address)
+    if value == -1:
+        return -1, -1
+
+    if not separator:
+        return value, 128
+    if not prefix.isdigit() or int(prefix) > 128:
+        return -1, -1
+    return value, int(prefix)
+
+# Network calculations. IPv6 has no broadcast address, so every address
+# from the network address to the last address of the block is usable.
+
+def calculateNetworkAddress(address:int, prefix:int) -> int:
+    return address & PREFIX_MASKS[prefix]
+
+def calculateLastAddress(address:int, prefix:int) -> int:
+    return address | HOST_MASKS[prefix]
+
+def calculateNetworkSize(prefix:int) -> int:
+    return 1 << (128 - prefix)
+
+class IPv6Address:
+    __slots__ = ('_value',)
+
+    def __init__(self, value:int):
+        if value < 0 or value > ALL_ONES:
+            raise ValueError(f'{value} is not a 128 bit address')
+        object.__setattr__(self, '_value', value)
+
+    @classmethod
+    def fromString(cls, text:str):
+        value = parseIpv6Address(text)
+        if value == -1:
+            raise ValueError(f'{text!r} is not a valid IPv6 address')
+        return cls(value)
+
+    @property
+    def value(self) -> int:
+        return self._value
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __int__(self):
+        return self._value
+
+    def __index__(self):
+        return self._value
+
+    def __eq__(self, other):
+        if not isinstance(other, IPv6Address):
+            return NotImplemented
+        return self._value == other._value
+
+    def __lt__(self, other):
+        if not isinstance(other, IPv6Address):
+            return NotImplemented
+        return self._value < other._value
+
+    def __hash__(self):
+        return hash(self._value)
+
+    def __str__(self):
+        return serializeIpv6Address(self._value)
+
+    def __repr__(self):
+        return f"IPv6Address('{self}')"
+
+class IPv6Network:
+    __slots__ = ('_network', '_prefix')
+
+    def __init__(self, address:int, prefix:int):
+        if prefix < 0 or prefix > 128:
+            raise ValueError(f'{prefix} is not a valid prefix length')
+        if address < 0 or address > ALL_ONES:
+            raise ValueError(f'{address} is not a 128 bit address')
+        object.__setattr__(self, '_network', address & PREFIX_MASKS[prefix])
+        object.__setattr__(self, '_prefix', prefix)
+
+    @classmethod
+    def fromString(cls, text:str):
+        address, prefix = parseIpv6Network(text)
+        if address == -1:
+            raise ValueError(f'{text!r} is not a valid IPv6 network')
+        return cls(address, prefix)
+
+    @property
+    def prefix(self) -> int:
+        return self._prefix
+
+    @property
+    def mask(self) -> int:
+        return PREFIX_MASKS[self._prefix]
+
+    @property
+    def networkAddress(self) -> int:
+        return self._network
+
+    @property
+    def firstAddress(self) -> int:
+        return self._network
+
+    @property
+    def lastAddress(self) -> int:
+        return self._network | HOST_MASKS[self._prefix]
+
+    @property
+    def size(self) -> int:
+        return HOST_MASKS[self._prefix] + 1
+
+    def contains(self, address:int) -> bool:
+        return address & PREFIX_MASKS[self._prefix] == self._network
+
+    def __contains__(self, address):
+        return self.contains(int(address))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __eq__(self, other):
+        if not isinstance(other, IPv6Network):
+            return NotImplemented
+        return self._network == other._network and self._prefix == other._prefix
+
+    def __lt__(self, other):
+        if not isinstance(other, IPv6Network):
+            return NotImplemented
+        return (self._network, self._prefix) < (other._network, other._prefix)
+
+    def __hash__(self):
+        return hash((self._network, self._prefix))
+
+    def __str__(self):
+        return f'{serializeIpv6Address(self._network)}/{self._prefix}'
+
+    def __repr__(self):
+        return f"IPv6Network('{self}')"
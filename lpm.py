@@ -0,0 +1,119 @@
+import numpy as np
+
+import core
+
+# Longest prefix match index. Networks are kept in one hash table per prefix
+# length, so a lookup is at most one dictionary probe per prefix length in use,
+# longest first. Batch lookups run the same probes on sorted numpy arrays.
+
+_MISSING = object()
+
+class PrefixIndex:
+    def __init__(self, entries = ()):
+        self._tables = [{} for _ in range(33)]
+        self._lengths = []
+        self._arrays = None
+        self._size = 0
+
+        for network, prefix, label in entries:
+            self.insert(network, prefix, label)
+
+    def insert(self, network:int, prefix:int, label):
+        if prefix < 0 or prefix > 32:
+            raise ValueError(f'{prefix} is not a valid prefix length')
+
+        table = self._tables[prefix]
+        if not table:
+            self._lengths = sorted(self._lengths + [prefix], reverse=True)
+
+        network &= core.PREFIX_MASKS[prefix]
+        if network not in table:
+            self._size += 1
+        table[network] = label
+        self._arrays = None
+
+    def delete(self, network:int, prefix:int):
+        if prefix < 0 or prefix > 32:
+            raise ValueError(f'{prefix} is not a valid prefix length')
+
+        table = self._tables[prefix]
+        label = table.pop(network & core.PREFIX_MASKS[prefix])
+        self._size -= 1
+        if not table:
+            self._lengths.remove(prefix)
+        self._arrays = None
+
+        return label
+
+    def get(self, network:int, prefix:int, default = None):
+        return self._tables[prefix].get(network & core.PREFIX_MASKS[prefix], default)
+
+    def lookup(self, address:int, default = None):
+        tables = self._tables
+        masks = core.PREFIX_MASKS
+        for prefix in self._lengths:
+            label = tables[prefix].get(address & masks[prefix], _MISSING)
+            if label is not _MISSING:
+                return label
+
+        return default
+
+    def lookupNetwork(self, address:int) -> tuple:
+        for prefix in self._lengths:
+            network = address & core.PREFIX_MASKS[prefix]
+            label = self._tables[prefix].get(network, _MISSING)
+            if label is not _MISSING:
+                return network, prefix, label
+
+        return None
+
+    def lookupMany(self, addresses, default = None) -> np.ndarray:
+        addresses = np.asarray(addresses, dtype=np.uint32)
+        result = np.full(addresses.shape, default, dtype=object)
+
+        # Sorted queries stay sorted after masking, which keeps searchsorted cache friendly
+        pending = np.argsort(addresses, axis=None, kind='stable')
+        queries = addresses.ravel()[pending]
+        flatResult = result.reshape(-1)
+
+        for prefix, networks, labels in self._sortedArrays():
+            if not len(pending):
+                break
+
+            masked = queries & np.uint32(core.PREFIX_MASKS[prefix])
+            positions = np.searchsorted(networks, masked)
+            np.minimum(positions, len(networks) - 1, out=positions)
+            hits = networks[positions] == masked
+
+            flatResult[pending[hits]] = labels[positions[hits]]
+            misses = ~hits
+            pending = pending[misses]
+            queries = queries[misses]
+
+        return result
+
+    def _sortedArrays(self) -> []:
+        if self._arrays is None:
+            self._arrays = []
+            for prefix in self._lengths:
+                table = self._tables[prefix]
+                networks = np.fromiter(table.keys(), dtype=np.uint32, count=len(table))
+                labels = np.empty(len(table), dtype=object)
+                labels[:] = list(table.values())
+
+                order = np.argsort(networks, kind='stable')
+                self._arrays.append((prefix, networks[order], labels[order]))
+
+        return self._arrays
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, entry):
+        network, prefix = entry
+        return (network & core.PREFIX_MASKS[prefix]) in self._tables[prefix]
+
+    def __iter__(self):
+        for prefix in sorted(self._lengths):
+            for network, label in sorted(self._tables[prefix].items()):
+                yield network, prefix, label
@@ -1,11 +1,53 @@
+import os
 import sys
-from PySide6 import QtWidgets
-import widgets
+import time
+
+# Startup profiling is enabled with --profile-startup or IPCALC_PROFILE_STARTUP=1
+PROFILE_STARTUP_ENV = 'IPCALC_PROFILE_STARTUP'
+
+class StartupProfile:
+    def __init__(self, enabled:bool):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.steps = []
+
+    def mark(self, step:str, seconds = None):
+        now = time.perf_counter()
+        if seconds is None:
+            seconds = now - self.last
+        self.last = now
+        self.steps.append((step, seconds))
+
+    def report(self, stream):
+        if not self.enabled:
+            return
+
+        print('Startup profile:', file=stream)
+        for step, seconds in self.steps:
+            print(f'  {step:<36}{seconds * 1000:>9.1f} ms', file=stream)
+        print(f'  {"total":<36}{(time.perf_counter() - self.started) * 1000:>9.1f} ms', file=stream)
 
 if __name__ == '__main__':
+    profileEnabled = '--profile-startup' in sys.argv or os.environ.get(PROFILE_STARTUP_ENV, '') not in ('', '0')
+    profile = StartupProfile(profileEnabled)
+
+    from PySide6 import QtWidgets
+    profile.mark('import PySide6')
+
+    import widgets
+    profile.mark('import widgets')
+
     app = QtWidgets.QApplication([])
+    profile.mark('create QApplication')
 
     window = widgets.MainWindow()
+    profile.mark('construct MainWindow')
+
     window.show()
+    profile.mark('show window')
+
+    window.groupBuilt.connect(lambda name, seconds: profile.mark(f'build {name}', seconds))
+    window.allGroupsBuilt.connect(lambda: profile.report(sys.stderr))
 
-    sys.exit(app.exec())
\ No newline at end of file
+    sys.exit(app.exec())
@@ -0,0 +1,424 @@
+import numbers
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import (ExtensionArray, ExtensionDtype, register_extension_dtype,
+                                   register_series_accessor, take)
+
+import batch
+import codec
+import core
+
+# pandas column types for IPv4 addresses and networks. Importing this module
+# registers the "ipv4" and "ipv4network" dtypes and the .ip Series accessor.
+# Addresses are stored as packed uint32 (networks add a uint8 prefix length)
+# next to a boolean mask of missing values, instead of one Python string per
+# row, and the accessor methods work on the whole packed column at once.
+#
+#   addresses = pd.Series(['10.0.0.1', '10.0.1.7']).astype('ipv4')
+#   addresses.groupby(addresses.ip.network(24)).size()
+
+def _column(values, dtype, copy:bool) -> np.ndarray:
+    values = np.asarray(values, dtype=dtype).ravel()
+    return values.copy() if copy else values
+
+def _missing(count:int) -> np.ndarray:
+    return np.zeros(count, dtype=bool)
+
+def _scalars(values) -> tuple[np.ndarray, np.ndarray]:
+    # Object array of the values and the mask of missing ones
+    if isinstance(values, str) or not pd.api.types.is_list_like(values):
+        raise TypeError(f'expected a sequence of values, got {type(values).__name__}')
+
+    values = np.asarray(values, dtype=object).ravel()
+    return values, np.asarray(pd.isna(values), dtype=bool)
+
+def _decodeStrings(texts:np.ndarray, decode) -> tuple:
+    # One buffer for the whole column, so parsing is a table lookup per octet
+    buffer = '\n'.join(texts.tolist()).encode('ascii', 'replace')
+    decoded = decode(buffer + b'\n')
+    if len(decoded[0]) != len(texts):
+        raise ValueError('values must not contain line breaks')
+    return decoded
+
+def _invalid(texts, positions) -> ValueError:
+    return ValueError(f'{texts[positions[0]]!r} is not a valid IPv4 value')
+
+def parseAddresses(values) -> tuple[np.ndarray, np.ndarray]:
+    # Strings, integers or core.IPv4Address objects to (uint32 values, missing mask)
+    values, mask = _scalars(values)
+    result = np.zeros(len(values), dtype=np.uint32)
+    present = values[~mask]
+
+    if len(present) and all(type(value) is str for value in present):
+        decoded = np.frombuffer(_decodeStrings(present, lambda buffer: (codec.decodeAddresses(buffer),))[0], dtype=np.int64)
+        bad = np.flatnonzero(decoded < 0)
+        if len(bad):
+            raise _invalid(present, bad)
+        result[~mask] = decoded
+        return result, mask
+
+    for i in np.flatnonzero(~mask):
+        result[i] = _addressValue(values[i])
+    return result, mask
+
+def _addressValue(value) -> int:
+    if isinstance(value, core.IPv4Address):
+        return int(value)
+    if isinstance(value, str):
+        packed = codec.parseAddress(value.encode('ascii', 'replace'))
+        if packed != -1:
+            return packed
+    elif isinstance(value, numbers.Integral) and 0 <= value <= core.ALL_ONES:
+        return int(value)
+    raise ValueError(f'{value!r} is not a valid IPv4 address')
+
+def parseNetworks(values) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # "ip/prefix", "ip/mask" or bare address strings, or core.IPv4Network
+    # objects, to (uint32 network addresses, uint8 prefixes, missing mask)
+    values, mask = _scalars(values)
+    networks = np.zeros(len(values), dtype=np.uint32)
+    prefixes = np.zeros(len(values), dtype=np.uint8)
+    present = values[~mask]
+
+    if len(present) and all(type(value) is str for value in present):
+        addresses, prefixArray = _decodeStrings(present, codec.decodeNetworks)
+        addresses = np.frombuffer(addresses, dtype=np.int64)
+        bad = np.flatnonzero(addresses < 0)
+        if len(bad):
+            raise _invalid(present, bad)
+        presentPrefixes = np.frombuffer(prefixArray, dtype=np.int8).astype(np.uint8)
+        networks[~mask] = addresses.astype(np.uint32) & batch.PREFIX_MASKS[presentPrefixes]
+        prefixes[~mask] = presentPrefixes
+        return networks, prefixes, mask
+
+    for i in np.flatnonzero(~mask):
+        value = values[i]
+        if isinstance(value, str):
+            value = core.IPv4Network.fromString(value)
+        if not isinstance(value, core.IPv4Network):
+            raise ValueError(f'{value!r} is not a valid IPv4 network')
+        networks[i] = value.networkAddress
+        prefixes[i] = value.prefix
+    return networks, prefixes, mask
+
+@register_extension_dtype
+class IPv4AddressDtype(ExtensionDtype):
+    name = 'ipv4'
+    type = core.IPv4Address
+    kind = 'O'
+    na_value = pd.NA
+
+    @classmethod
+    def construct_array_type(cls):
+        return IPv4AddressArray
+
+@register_extension_dtype
+class IPv4NetworkDtype(ExtensionDtype):
+    name = 'ipv4network'
+    type = core.IPv4Network
+    kind = 'O'
+    na_value = pd.NA
+
+    @classmethod
+    def construct_array_type(cls):
+        return IPv4NetworkArray
+
+class IPv4AddressArray(ExtensionArray):
+    def __init__(self, values, mask = None, copy = False):
+        self._values = _column(values, np.uint32, copy)
+        self._mask = _missing(len(self._values)) if mask is None else _column(mask, bool, copy)
+
+    # Construction
+
+    @classmethod
+    def _from_sequence(cls, scalars, *, dtype = None, copy = False):
+        if isinstance(scalars, cls):
+            return scalars.copy() if copy else scalars
+        return cls(*parseAddresses(scalars))
+
+    @classmethod
+    def _from_sequence_of_strings(cls, strings, *, dtype = None, copy = False):
+        return cls(*parseAddresses(strings))
+
+    @classmethod
+    def _from_factorized(cls, values, original):
+        return cls(values)
+
+    @classmethod
+    def _concat_same_type(cls, to_concat):
+        return cls(np.concatenate([array._values for array in to_concat]),
+                   np.concatenate([array._mask for array in to_concat]))
+
+    def _withValues(self, values, mask):
+        return type(self)(values, mask)
+
+    # Interface
+
+    @property
+    def dtype(self):
+        return IPv4AddressDtype()
+
+    @property
+    def nbytes(self):
+        return self._values.nbytes + self._mask.nbytes
+
+    def __len__(self):
+        return len(self._values)
+
+    def _box(self, i:int):
+        return pd.NA if self._mask[i] else core.IPv4Address(int(self._values[i]))
+
+    def __getitem__(self, item):
+        if pd.api.types.is_integer(item):
+            return self._box(item)
+
+        item = pd.api.indexers.check_array_indexer(self, item)
+        return self._withValues(self._values[item], self._mask[item])
+
+    def __setitem__(self, key, value):
+        key = pd.api.indexers.check_array_indexer(self, key)
+        values, mask = self._parseLike(value if pd.api.types.is_list_like(value) and not isinstance(value, str) else [value])
+        self._values[key] = values if len(values) != 1 else values[0]
+        self._mask[key] = mask if len(mask) != 1 else mask[0]
+
+    def _parseLike(self, values) -> tuple:
+        if isinstance(values, type(self)):
+            return values._values, values._mask
+        return parseAddresses(values)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._box(i)
+
+    def isna(self):
+        return self._mask.copy()
+
+    def copy(self):
+        return self._withValues(self._values.copy(), self._mask.copy())
+
+    def take(self, indices, allow_fill = False, fill_value = None):
+        fillValue = 0
+        fillMissing = True
+        if allow_fill and fill_value is not None and not pd.isna(fill_value):
+            fillValue = self._parseLike([fill_value])[0][0]
+            fillMissing = False
+
+        values = take(self._values, indices, allow_fill=allow_fill, fill_value=fillValue)
+        mask = take(self._mask, indices, allow_fill=allow_fill, fill_value=fillMissing)
+        return self._withValues(values, mask)
+
+    def _sortKeys(self) -> np.ndarray:
+        return self._values.astype(np.int64)
+
+    def _values_for_argsort(self):
+        return self._sortKeys()
+
+    def _values_for_factorize(self):
+        return np.where(self._mask, -1, self._sortKeys()), -1
+
+    def __eq__(self, other):
+        if isinstance(other, (pd.Series, pd.Index, pd.DataFrame)):
+            return NotImplemented
+
+        if isinstance(other, ExtensionArray) and not isinstance(other, type(self)):
+            return np.zeros(len(self), dtype=bool)
+        if pd.api.types.is_list_like(other) and not isinstance(other, str):
+            other = other if isinstance(other, type(self)) else self._from_sequence(other)
+            return self._keysEqual(other) & ~self._mask & ~other._mask
+        if pd.isna(other):
+            return np.zeros(len(self), dtype=bool)
+
+        other = self._from_sequence([other])
+        return self._keysEqual(other) & ~self._mask
+
+    def isin(self, values) -> np.ndarray:
+        # values are parsed like the column, so strings match; missing rows never do
+        if isinstance(values, (pd.Series, pd.Index)):
+            values = values.array
+        if isinstance(values, ExtensionArray) and type(values) is not type(self):
+            return np.zeros(len(self), dtype=bool)
+        if type(values) is not type(self):
+            values = self._from_sequence(values)
+
+        keys = values._sortKeys()[~values._mask]
+        return np.isin(self._sortKeys(), keys) & ~self._mask
+
+    def _keysEqual(self, other) -> np.ndarray:
+        return self._sortKeys() == other._sortKeys()
+
+    def astype(self, dtype, copy = True):
+        dtype = pd.api.types.pandas_dtype(dtype)
+        if dtype == self.dtype:
+            return self.copy() if copy else self
+        if isinstance(dtype, ExtensionDtype) and not pd.api.types.is_string_dtype(dtype):
+            return super().astype(dtype, copy)
+        if pd.api.types.is_string_dtype(dtype):
+            strings = np.array([None if missing else text for text, missing in zip(self._strings(), self._mask)], dtype=object)
+            return pd.array(strings, dtype=dtype) if isinstance(dtype, ExtensionDtype) else strings
+        if pd.api.types.is_integer_dtype(dtype):
+            if self._mask.any():
+                raise ValueError('cannot convert missing values to integers')
+            return self._values.astype(dtype, copy=copy)
+        return np.array(list(self), dtype=dtype)
+
+    def _strings(self, binaryMode = False) -> []:
+        return [codec.formatAddress(value, binaryMode) for value in self._values.tolist()]
+
+    def __array__(self, dtype = None, copy = None):
+        return np.array(list(self), dtype=object)
+
+    def _formatter(self, boxed = False):
+        return str
+
+class IPv4NetworkArray(IPv4AddressArray):
+    def __init__(self, values, prefixes, mask = None, copy = False):
+        super().__init__(values, mask, copy)
+        self._prefixes = _column(prefixes, np.uint8, copy)
+        if len(self._prefixes) and self._prefixes.max() > 32:
+            raise ValueError('prefix lengths must be between 0 and 32')
+        self._values = self._values & batch.PREFIX_MASKS[self._prefixes]
+
+    @classmethod
+    def _from_sequence(cls, scalars, *, dtype = None, copy = False):
+        if isinstance(scalars, cls):
+            return scalars.copy() if copy else scalars
+        return cls(*parseNetworks(scalars))
+
+    @classmethod
+    def _from_sequence_of_strings(cls, strings, *, dtype = None, copy = False):
+        return cls(*parseNetworks(strings))
+
+    @classmethod
+    def _from_factorized(cls, values, original):
+        return cls(values >> 8, values & 0xFF)
+
+    @classmethod
+    def _concat_same_type(cls, to_concat):
+        return cls(np.concatenate([array._values for array in to_concat]),
+                   np.concatenate([array._prefixes for array in to_concat]),
+                   np.concatenate([array._mask for array in to_concat]))
+
+    @property
+    def dtype(self):
+        return IPv4NetworkDtype()
+
+    @property
+    def nbytes(self):
+        return super().nbytes + self._prefixes.nbytes
+
+    def _box(self, i:int):
+        return pd.NA if self._mask[i] else core.IPv4Network(int(self._values[i]), int(self._prefixes[i]))
+
+    def __getitem__(self, item):
+        if pd.api.types.is_integer(item):
+            return self._box(item)
+
+        item = pd.api.indexers.check_array_indexer(self, item)
+        return type(self)(self._values[item], self._prefixes[item], self._mask[item])
+
+    def __setitem__(self, key, value):
+        key = pd.api.indexers.check_array_indexer(self, key)
+        values, prefixes, mask = self._parseLike(value if pd.api.types.is_list_like(value) and not isinstance(value, str) else [value])
+        single = len(values) == 1
+        self._values[key] = values[0] if single else values
+        self._prefixes[key] = prefixes[0] if single else prefixes
+        self._mask[key] = mask[0] if single else mask
+
+    def _parseLike(self, values) -> tuple:
+        if isinstance(values, type(self)):
+            return values._values, values._prefixes, values._mask
+        return parseNetworks(values)
+
+    def copy(self):
+        return type(self)(self._values.copy(), self._prefixes.copy(), self._mask.copy())
+
+    def take(self, indices, allow_fill = False, fill_value = None):
+        fillValue = fillPrefix = 0
+        fillMissing = True
+        if allow_fill and fill_value is not None and not pd.isna(fill_value):
+            values, prefixes, _ = self._parseLike([fill_value])
+            fillValue, fillPrefix = values[0], prefixes[0]
+            fillMissing = False
+
+        return type(self)(
+            take(self._values, indices, allow_fill=allow_fill, fill_value=fillValue),
+            take(self._prefixes, indices, allow_fill=allow_fill, fill_value=fillPrefix),
+            take(self._mask, indices, allow_fill=allow_fill, fill_value=fillMissing))
+
+    def _sortKeys(self) -> np.ndarray:
+        # Network address first, shorter prefix first on ties, like core.IPv4Network ordering
+        return self._values.astype(np.int64) << 8 | self._prefixes
+
+    def astype(self, dtype, copy = True):
+        dtype = pd.api.types.pandas_dtype(dtype)
+        if pd.api.types.is_integer_dtype(dtype):
+            raise TypeError('networks cannot be converted to integers, use .ip.network_address')
+        return super().astype(dtype, copy)
+
+    def _strings(self, binaryMode = False) -> []:
+        return [f'{codec.formatAddress(value, binaryMode)}/{prefix}'
+                for value, prefix in zip(self._values.tolist(), self._prefixes.tolist())]
+
+def _networkArgument(network) -> core.IPv4Network:
+    if isinstance(network, str):
+        return core.IPv4Network.fromString(network)
+    if isinstance(network, core.IPv4Network):
+        return network
+    raise TypeError(f'expected a network, got {type(network).__name__}')
+
+@register_series_accessor('ip')
+class IPAccessor:
+    def __init__(self, series:pd.Series):
+        if not isinstance(series.dtype, (IPv4AddressDtype, IPv4NetworkDtype)):
+            raise AttributeError('the .ip accessor needs an ipv4 or ipv4network column')
+        self._series = series
+        self._array = series.array
+
+    def _wrap(self, array) -> pd.Series:
+        return pd.Series(array, index=self._series.index, name=self._series.name)
+
+    def _requireNetworks(self, name:str):
+        if not isinstance(self._array, IPv4NetworkArray):
+            raise TypeError(f'.ip.{name} needs an ipv4network column, use .ip.network(prefix) first')
+
+    def network(self, prefix:int) -> pd.Series:
+        # Enclosing network of every row at the given prefix length, as an ipv4network column
+        if prefix < 0 or prefix > 32:
+            raise ValueError(f'{prefix} is not a valid prefix length')
+
+        array = self._array
+        if isinstance(array, IPv4NetworkArray) and np.any(array._prefixes[~array._mask] < prefix):
+            raise ValueError(f'some networks are already larger than /{prefix}')
+
+        return self._wrap(IPv4NetworkArray(array._values, np.full(len(array), prefix, dtype=np.uint8), array._mask, copy=True))
+
+    @property
+    def prefix(self) -> pd.Series:
+        self._requireNetworks('prefix')
+        return self._wrap(pd.arrays.IntegerArray(self._array._prefixes.copy(), self._array._mask.copy()))
+
+    @property
+    def network_address(self) -> pd.Series:
+        self._requireNetworks('network_address')
+        return self._wrap(IPv4AddressArray(self._array._values, self._array._mask, copy=True))
+
+    @property
+    def broadcast(self) -> pd.Series:
+        self._requireNetworks('broadcast')
+        array = self._array
+        return self._wrap(IPv4AddressArray(batch.calculateBroadcastAddresses(array._values, batch.PREFIX_MASKS[array._prefixes]), array._mask, copy=True))
+
+    def in_network(self, network) -> pd.Series:
+        # Addresses inside the network, or networks that lie entirely inside it. Missing rows are False.
+        network = _networkArgument(network)
+        array = self._array
+        inside = (array._values & np.uint32(network.mask)) == np.uint32(network.networkAddress)
+        if isinstance(array, IPv4NetworkArray):
+            inside &= array._prefixes >= network.prefix
+        return pd.Series(inside & ~array._mask, index=self._series.index, name=self._series.name)
+
+    def to_binary_str(self) -> pd.Series:
+        strings = np.array(self._array._strings(binaryMode=True), dtype=object)
+        strings[self._array._mask] = None
+        return pd.Series(strings, index=self._series.index, name=self._series.name)
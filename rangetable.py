@@ -0,0 +1,208 @@
+import bisect
+import os
+import struct
+
+import numpy as np
+
+import codec
+import core
+
+# Labels for arbitrary inclusive address ranges, GeoIP or ASN style. Ranges
+# are kept as sorted, non-overlapping uint32 start and end arrays and each
+# range points at one entry of a table of distinct labels. A single lookup is
+# a bisect over the starts, a batch lookup one searchsorted call.
+#
+# Parsing text is the slow part, so tables can be saved in a packed binary
+# form that loads with a few numpy views.
+
+SNAPSHOT_MAGIC = b'IPRT'
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct('<4sBII')
+
+SORTED_QUERY_THRESHOLD = 1 << 16
+
+class RangeTable:
+    def __init__(self, starts, ends, labels):
+        # labels holds one label per range, any hashable values
+        index = {}
+        codes = np.fromiter((index.setdefault(label, len(index)) for label in labels), dtype=np.uint32)
+        self._build(starts, ends, codes, list(index))
+
+    @classmethod
+    def fromCodes(cls, starts, ends, codes, labels:[]):
+        # Ranges that already refer to a table of distinct labels by position
+        table = cls.__new__(cls)
+        table._build(starts, ends, codes, labels)
+        return table
+
+    def _build(self, starts, ends, codes, labels:[]):
+        starts = np.asarray(starts, dtype=np.int64).ravel()
+        ends = np.asarray(ends, dtype=np.int64).ravel()
+        codes = np.asarray(codes, dtype=np.uint32).ravel()
+        if not len(starts) == len(ends) == len(codes):
+            raise ValueError('starts, ends and labels must have the same length')
+        if len(starts):
+            if starts.min() < 0 or ends.max() > core.ALL_ONES:
+                raise ValueError('ranges must be inside the IPv4 address space')
+            if codes.max() >= len(labels):
+                raise ValueError('label code out of range')
+
+        bad = np.flatnonzero(starts > ends)
+        if len(bad):
+            i = int(bad[0])
+            raise ValueError(f'range {i} starts at {codec.formatAddress(int(starts[i]))} after its end {codec.formatAddress(int(ends[i]))}')
+
+        order = None
+        if len(starts) > 1 and np.any(starts[1:] < starts[:-1]):
+            order = np.argsort(starts, kind='stable')
+            starts = starts[order]
+            ends = ends[order]
+            codes = codes[order]
+
+        overlaps = np.flatnonzero(starts[1:] <= ends[:-1])
+        if len(overlaps):
+            i = int(overlaps[0])
+            first, second = (i, i + 1) if order is None else (int(order[i]), int(order[i + 1]))
+            raise ValueError(f'range {second} ({self._rangeText(starts[i + 1], ends[i + 1])}) '
+                             f'overlaps range {first} ({self._rangeText(starts[i], ends[i])})')
+
+        self.starts = starts.astype(np.uint32)
+        self.ends = ends.astype(np.uint32)
+        self.codes = codes
+        self.labels = list(labels)
+        self._labelArray = None
+        self._startList = None
+        self._endList = None
+
+    @staticmethod
+    def _rangeText(start, end) -> str:
+        return f'{codec.formatAddress(int(start))}-{codec.formatAddress(int(end))}'
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        for start, end, code in zip(self.starts.tolist(), self.ends.tolist(), self.codes.tolist()):
+            yield start, end, self.labels[code]
+
+    def indexOf(self, address:int) -> int:
+        # Position of the range holding address, -1 when none does
+        if self._startList is None:
+            self._startList = self.starts.tolist()
+            self._endList = self.ends.tolist()
+
+        i = bisect.bisect_right(self._startList, address) - 1
+        if i >= 0 and address <= self._endList[i]:
+            return i
+        return -1
+
+    def lookup(self, address:int, default = None):
+        i = self.indexOf(address)
+        return default if i == -1 else self.labels[self.codes[i]]
+
+    def indexOfMany(self, addresses) -> np.ndarray:
+        addresses = np.asarray(addresses, dtype=np.uint32)
+        if not len(self.starts):
+            return np.full(addresses.shape, -1, dtype=np.int64)
+
+        flat = addresses.ravel()
+        if len(flat) >= SORTED_QUERY_THRESHOLD:
+            # Sorted queries walk the starts in order instead of probing at random, several times faster
+            order = np.argsort(flat)
+            positions = np.empty(len(flat), dtype=np.int64)
+            positions[order] = np.searchsorted(self.starts, flat[order], side='right')
+            positions = positions.reshape(addresses.shape) - 1
+        else:
+            positions = np.searchsorted(self.starts, addresses, side='right') - 1
+        # Below the first range positions is -1, which reads the last end and is masked out anyway
+        found = (positions >= 0) & (addresses <= self.ends[positions])
+        return np.where(found, positions, -1)
+
+    def codesMany(self, addresses) -> np.ndarray:
+        # Label codes as int64, -1 for addresses outside every range
+        positions = self.indexOfMany(addresses)
+        if not len(self.codes):
+            return positions
+        return np.where(positions >= 0, self.codes[positions].astype(np.int64), -1)
+
+    def lookupMany(self, addresses, default = None) -> np.ndarray:
+        if self._labelArray is None:
+            self._labelArray = np.empty(len(self.labels) + 1, dtype=object)
+            self._labelArray[:-1] = self.labels
+        self._labelArray[-1] = default
+        return self._labelArray[self.codesMany(addresses)] # -1 picks the default
+
+    def toBytes(self) -> bytes:
+        # Labels are stored as text, so they come back as strings
+        encoded = [str(label).encode('utf-8') for label in self.labels]
+        offsets = np.cumsum([0] + [len(label) for label in encoded], dtype=np.uint64)
+        return b''.join([
+            _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(self.starts), len(encoded)),
+            self.starts.astype('<u4').tobytes(),
+            self.ends.astype('<u4').tobytes(),
+            self.codes.astype('<u4').tobytes(),
+            offsets.astype('<u8').tobytes(),
+            b''.join(encoded)])
+
+    @classmethod
+    def fromBytes(cls, data:bytes):
+        magic, version, count, labelCount = _HEADER.unpack_from(data, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            raise ValueError('not a range table snapshot')
+
+        offset = _HEADER.size
+        columns = []
+        for dtype, length in (('<u4', count), ('<u4', count), ('<u4', count), ('<u8', labelCount + 1)):
+            columns.append(np.frombuffer(data, dtype=dtype, count=length, offset=offset))
+            offset += columns[-1].nbytes
+        starts, ends, codes, offsets = columns
+
+        blob = data[offset:]
+        bounds = offsets.tolist()
+        labels = [blob[bounds[i]:bounds[i + 1]].decode('utf-8') for i in range(labelCount)]
+
+        return cls.fromCodes(starts, ends, codes, labels)
+
+    def save(self, path:str):
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as stream:
+            stream.write(self.toBytes())
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path:str):
+        with open(path, 'rb') as stream:
+            return cls.fromBytes(stream.read())
+
+def _parseBound(text:bytes, lineNumber:int) -> int:
+    # Dotted quad or a plain integer, the two forms range datasets come in
+    text = text.strip()
+    if text.isdigit():
+        value = int(text)
+        if value <= core.ALL_ONES:
+            return value
+    else:
+        value = codec.parseAddress(text)
+        if value != -1:
+            return value
+    raise ValueError(f'line {lineNumber}: {text.decode("ascii", "replace")!r} is not an address')
+
+def parseCsv(stream) -> RangeTable:
+    # "start,end,label" per line of a binary stream, blank lines and # comments are ignored
+    starts = []
+    ends = []
+    labels = []
+    for lineNumber, line in enumerate(stream, 1):
+        if not line.strip() or line.startswith(b'#'):
+            continue
+
+        fields = line.rstrip(b'\r\n').split(b',', 2)
+        if len(fields) != 3:
+            raise ValueError(f'line {lineNumber}: expected "start,end,label"')
+
+        starts.append(_parseBound(fields[0], lineNumber))
+        ends.append(_parseBound(fields[1], lineNumber))
+        labels.append(fields[2].decode('utf-8'))
+
+    return RangeTable(starts, ends, labels)
@@ -0,0 +1,383 @@
+import collections
+import os
+
+import numpy as np
+from PySide6 import QtCore, QtWidgets
+from PySide6.QtCore import Qt
+
+import aggregate
+import batch
+import codec
+import columns
+import core
+import tasks
+import widgets
+
+# A table over millions of networks loaded from a file. Only the packed
+# addresses and prefix lengths are kept in memory; the text of a row is
+# computed when the view asks for it, one block of rows at a time, and a
+# bounded number of blocks are cached. Sorting and filtering work on the
+# packed arrays and only ever produce an index array of visible rows. Both
+# loading and sorting run on the thread pool (see tasks).
+
+# Smaller than the aggregate default: splitting a chunk into lines holds the
+# GIL, and the GUI thread needs it to keep painting while a file loads.
+LOAD_CHUNK_SIZE = 1 << 20
+
+COLUMNS = ('Address', 'Prefix', 'Network Address', 'Broadcast Address', 'First Address', 'Last Address', 'Addresses')
+
+def readNetworkFile(context, path:str, chunkSize = LOAD_CHUNK_SIZE) -> tuple[np.ndarray, np.ndarray, int]:
+    # Lines are "ip/prefix", "ip/mask" or a bare address. Returns the packed
+    # addresses, the prefix lengths and the number of invalid lines skipped.
+    # Column files are mapped instead of parsed.
+    if columns.isColumnFile(path):
+        columnFile = columns.ColumnFile(path)
+        return columnFile.addresses, columnFile.prefixes, 0
+
+    total = os.path.getsize(path)
+    addresses = []
+    prefixes = []
+    invalid = 0
+    with open(path, 'rb') as stream:
+        for chunk in aggregate.readChunks(stream, chunkSize):
+            chunkAddresses, chunkPrefixes = codec.decodeNetworks(chunk)
+            chunkAddresses = np.frombuffer(chunkAddresses, dtype=np.int64)
+            valid = chunkAddresses >= 0
+            invalid += len(valid) - int(np.count_nonzero(valid))
+            addresses.append(chunkAddresses[valid].astype(np.uint32))
+            prefixes.append(np.frombuffer(chunkPrefixes, dtype=np.int8)[valid].astype(np.uint8))
+            if context is not None:
+                context.progress(stream.tell(), total)
+
+    if not addresses:
+        return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.uint8), invalid
+    return np.concatenate(addresses), np.concatenate(prefixes), invalid
+
+def sortKeys(addresses:np.ndarray, prefixes:np.ndarray, column:int) -> np.ndarray:
+    if column == 0:
+        return addresses
+    if column == 1:
+        return prefixes
+    if column == 6:
+        # Address count only depends on the prefix and shrinks as it grows
+        return -prefixes.astype(np.int16)
+
+    result = batch.calculate(addresses, prefixes=prefixes)
+    return (result.networkAddress, result.broadcastAddress, result.firstAddress, result.lastAddress)[column - 2]
+
+def visibleRows(context, addresses:np.ndarray, prefixes:np.ndarray, network, sortColumn:int, sortOrder) -> tuple:
+    # Row indices after filtering and sorting, None when that is every row in file order
+    rows = None
+    if network is not None:
+        mask = np.uint32(network.mask)
+        rows = np.flatnonzero((addresses & mask) == np.uint32(network.networkAddress))
+        context.checkCancelled()
+
+    if 0 <= sortColumn < len(COLUMNS):
+        indices = slice(None) if rows is None else rows
+        keys = sortKeys(addresses[indices], prefixes[indices], sortColumn)
+        context.checkCancelled()
+
+        order = np.argsort(keys, kind='stable')
+        if sortOrder == Qt.SortOrder.DescendingOrder:
+            order = order[::-1]
+        rows = order if rows is None else rows[order]
+
+    return addresses, prefixes, rows
+
+class ResultsModel(QtCore.QAbstractTableModel):
+    blockSize = 256
+    maxCachedBlocks = 64
+
+    rowsReady = QtCore.Signal()
+
+    def __init__(self):
+        super().__init__()
+
+        self.addresses = np.empty(0, dtype=np.uint32)
+        self.prefixes = np.empty(0, dtype=np.uint8)
+        self.network = None # Only rows inside this network are shown
+        self.sortColumn = -1
+        self.sortOrder = Qt.SortOrder.AscendingOrder
+
+        self._rows = None # Indices of the visible rows, None while they are all shown in file order
+        self._blocks = collections.OrderedDict()
+        self._source = (self.addresses, self.prefixes) # Shown once its rows are computed
+
+        self.tasks = tasks.TaskRunner(self)
+        self.tasks.finished.connect(self.onRowsReady)
+
+    def setNetworks(self, addresses, prefixes):
+        self._source = (np.asarray(addresses, dtype=np.uint32), np.asarray(prefixes, dtype=np.uint8))
+        self._updateRows()
+
+    def setNetworkFilter(self, network:core.IPv4Network):
+        self.network = network
+        self._updateRows()
+
+    def rowCount(self, parent = QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.addresses) if self._rows is None else len(self._rows)
+
+    def columnCount(self, parent = QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role = Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return COLUMNS[section]
+        return str(section + 1)
+
+    def data(self, index, role = Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+
+        block, offset = divmod(index.row(), self.blockSize)
+        return self._block(block)[offset][index.column()]
+
+    def sort(self, column, order = Qt.SortOrder.AscendingOrder):
+        self.sortColumn = column
+        self.sortOrder = order
+        self._updateRows()
+
+    def onRowsReady(self, result:tuple):
+        addresses, prefixes, rows = result
+        count = len(addresses) if rows is None else len(rows)
+
+        # A new order of the same rows keeps the selection and scroll position, anything else resets the view
+        reordered = addresses is self.addresses and count == self.rowCount()
+        if reordered:
+            self.layoutAboutToBeChanged.emit()
+        else:
+            self.beginResetModel()
+
+        if reordered:
+            self._remapPersistentIndexes(rows, count)
+
+        self.addresses = addresses
+        self.prefixes = prefixes
+        self._rows = rows
+        self._blocks.clear()
+
+        if reordered:
+            self.layoutChanged.emit()
+        else:
+            self.endResetModel()
+        self.rowsReady.emit()
+
+    def _remapPersistentIndexes(self, rows, count:int):
+        # Selection and current index follow their networks to the new rows,
+        # ones the new rows no longer show become invalid
+        indexes = self.persistentIndexList()
+        if not indexes:
+            return
+
+        oldRows = np.array([index.row() for index in indexes], dtype=np.int64)
+        sources = oldRows if self._rows is None else self._rows[oldRows]
+
+        positions = np.full(len(self.addresses), -1, dtype=np.int64)
+        positions[slice(None) if rows is None else rows] = np.arange(count)
+        newRows = positions[sources].tolist()
+
+        self.changePersistentIndexList(indexes, [
+            self.index(row, index.column()) if row >= 0 else QtCore.QModelIndex()
+            for index, row in zip(indexes, newRows)])
+
+    def formatRows(self, start:int, stop:int) -> []:
+        # Row tuples for any range, computed directly so copying does not push the visible blocks out of the cache
+        indices = self._indices(start, stop)
+        addresses = self.addresses[indices]
+        prefixes = self.prefixes[indices]
+        result = batch.calculate(addresses, prefixes=prefixes)
+
+        formatAddress = codec.formatAddress
+        return [
+            (formatAddress(address), str(prefix), formatAddress(network), formatAddress(broadcast),
+             formatAddress(first), formatAddress(last), str(count))
+            for address, prefix, network, broadcast, first, last, count in zip(
+                addresses.tolist(), prefixes.tolist(), result.networkAddress.tolist(), result.broadcastAddress.tolist(),
+                result.firstAddress.tolist(), result.lastAddress.tolist(), result.addressCount.tolist())]
+
+    def exportCsv(self, stream, ranges = None):
+        # Writes the given (start, stop) row ranges, or every visible row, in blocks
+        if ranges is None:
+            ranges = [(0, self.rowCount())]
+
+        stream.write(','.join(COLUMNS) + '\n')
+        for start, stop in ranges:
+            for blockStart in range(start, stop, self.blockSize * 16):
+                rows = self.formatRows(blockStart, min(stop, blockStart + self.blockSize * 16))
+                stream.writelines(','.join(row) + '\n' for row in rows)
+
+    def _indices(self, start:int, stop:int):
+        if self._rows is None:
+            return slice(start, stop)
+        return self._rows[start:stop]
+
+    def _block(self, number:int) -> []:
+        rows = self._blocks.get(number)
+        if rows is not None:
+            self._blocks.move_to_end(number)
+            return rows
+
+        start = number * self.blockSize
+        rows = self._blocks[number] = self.formatRows(start, start + self.blockSize)
+        if len(self._blocks) > self.maxCachedBlocks:
+            self._blocks.popitem(last=False)
+        return rows
+
+    def _updateRows(self):
+        addresses, prefixes = self._source
+        if self.network is None and self.sortColumn < 0:
+            self.tasks.cancel()
+            self.onRowsReady((addresses, prefixes, None))
+        else:
+            self.tasks.submit(visibleRows, addresses, prefixes, self.network, self.sortColumn, self.sortOrder)
+
+class ResultsView(QtWidgets.QTableView):
+    def __init__(self):
+        super().__init__()
+
+        # Fixed row heights let the view scroll without measuring rows
+        self.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Fixed)
+        self.verticalHeader().setDefaultSectionSize(self.fontMetrics().height() + 6)
+        self.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Interactive)
+        self.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.setSortingEnabled(True)
+        self.sortByColumn(-1, Qt.SortOrder.AscendingOrder)
+
+    def selectedRanges(self) -> []:
+        # Selected rows as merged (start, stop) ranges, without listing every selected index
+        ranges = sorted((r.top(), r.bottom() + 1) for r in self.selectionModel().selection())
+        merged = []
+        for start, stop in ranges:
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+            else:
+                merged.append((start, stop))
+        return merged
+
+    def keyPressEvent(self, event):
+        if widgets.isShortcut(event, Qt.Key.Key_C) and self.model() is not None:
+            lines = []
+            for start, stop in self.selectedRanges():
+                lines.extend('\t'.join(row) for row in self.model().formatRows(start, stop))
+            if lines:
+                widgets.copyToClipboard('\n'.join(lines))
+        else:
+            super().keyPressEvent(event)
+
+class ResultsGroup(QtWidgets.QWidget):
+    def __init__(self):
+        super().__init__()
+
+        layout = QtWidgets.QGridLayout()
+        self.setLayout(layout)
+
+        groupbox = QtWidgets.QGroupBox("Bulk Results")
+        layout.addWidget(groupbox)
+
+        boxLayout = QtWidgets.QGridLayout()
+        groupbox.setLayout(boxLayout)
+
+        btnOpen = QtWidgets.QPushButton("Open...")
+        btnExport = QtWidgets.QPushButton("Export...")
+        self.txtFilter = QtWidgets.QLineEdit()
+        self.txtFilter.setPlaceholderText("e.g. 10.0.0.0/8")
+        self.lblStatus = QtWidgets.QLabel()
+        self.progressBar = QtWidgets.QProgressBar()
+        self.progressBar.setVisible(False)
+        self.btnCancel = QtWidgets.QPushButton("Cancel")
+        self.btnCancel.setVisible(False)
+
+        boxLayout.addWidget(btnOpen, 0, 0)
+        boxLayout.addWidget(btnExport, 0, 1)
+        boxLayout.addWidget(QtWidgets.QLabel("Only in network:"), 0, 2, Qt.AlignmentFlag.AlignRight)
+        boxLayout.addWidget(self.txtFilter, 0, 3)
+        boxLayout.addWidget(self.lblStatus, 0, 4)
+        boxLayout.addWidget(self.progressBar, 0, 5)
+        boxLayout.addWidget(self.btnCancel, 0, 6)
+
+        self.model = ResultsModel()
+        self.view = ResultsView()
+        self.view.setModel(self.model)
+        self.view.setMinimumHeight(200)
+        boxLayout.addWidget(self.view, 1, 0, 1, 7)
+
+        self.invalid = 0
+        self.loader = tasks.TaskRunner(self)
+        self.loader.progress.connect(self.onLoadProgress)
+        self.loader.finished.connect(self.onLoaded)
+        self.loader.failed.connect(self.lblStatus.setText)
+        self.loader.busyChanged.connect(self.onBusyChanged)
+        self.model.tasks.busyChanged.connect(self.onBusyChanged)
+        self.model.rowsReady.connect(self.updateStatus)
+
+        btnOpen.clicked.connect(lambda: self.onOpenClicked())
+        btnExport.clicked.connect(lambda: self.onExportClicked())
+        self.btnCancel.clicked.connect(lambda: self.onCancelClicked())
+        self.txtFilter.editingFinished.connect(lambda: self.onFilterChanged())
+
+    def onOpenClicked(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Open Addresses")
+        if path:
+            self.open(path)
+
+    def open(self, path:str):
+        self.lblStatus.setText(f'Loading {os.path.basename(path)}')
+        self.progressBar.setValue(0)
+        self.loader.submit(readNetworkFile, path)
+
+    def onLoadProgress(self, done:int, total:int):
+        self.progressBar.setValue(done * 100 // max(total, 1))
+
+    def onLoaded(self, result:tuple):
+        addresses, prefixes, self.invalid = result
+        self.model.setNetworks(addresses, prefixes)
+
+    def onBusyChanged(self):
+        busy = self.loader.isBusy() or self.model.tasks.isBusy()
+        self.progressBar.setVisible(busy)
+        self.btnCancel.setVisible(busy)
+        if self.model.tasks.isBusy() and not self.loader.isBusy():
+            self.progressBar.setRange(0, 0) # Sorting has no progress, show a busy indicator
+        else:
+            self.progressBar.setRange(0, 100)
+
+    def onCancelClicked(self):
+        self.loader.cancel()
+        self.model.tasks.cancel()
+        self.lblStatus.setText('Cancelled')
+
+    def updateStatus(self):
+        status = f'{self.model.rowCount()} of {len(self.model.addresses)} rows'
+        if self.invalid:
+            status += f', {self.invalid} invalid lines skipped'
+        self.lblStatus.setText(status)
+
+    def onExportClicked(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export Rows", filter="CSV files (*.csv)")
+        if path:
+            self.export(path)
+
+    def export(self, path:str):
+        # Exports the selection, or every visible row when nothing is selected
+        ranges = self.view.selectedRanges() or None
+        with open(path, 'w', encoding='utf-8', newline='') as stream:
+            self.model.exportCsv(stream, ranges)
+
+    def onFilterChanged(self):
+        text = self.txtFilter.text().strip()
+        if not text:
+            self.model.setNetworkFilter(None)
+            return
+
+        try:
+            network = core.IPv4Network.fromString(text)
+        except ValueError:
+            self.lblStatus.setText(f'{text!r} is not a network')
+            return
+
+        self.model.setNetworkFilter(network)
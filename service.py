@@ -0,0 +1,353 @@
+import argparse
+import asyncio
+import http.client
+import json
+import socket
+import sys
+
+import batch
+import codec
+import core
+import vlsm
+
+# Local calculation service. A small HTTP/1.1 server with keep-alive runs on
+# localhost and/or a Unix socket. Network info requests that arrive close
+# together are coalesced and calculated in one vectorized batch.
+#
+#   POST /network  {"address": "10.1.2.3", "prefix": 24} or {"address": ..., "mask": "255.255.255.0"},
+#                  or a list of those
+#   POST /mask     {"prefix": 24} or {"mask": "255.255.255.0"}
+#   POST /size     {"hosts": 300}
+#   GET  /health
+
+DEFAULT_PORT = 8471
+DEFAULT_MAX_BATCH = 4096
+DEFAULT_MAX_DELAY = 0.0
+MAX_BODY_SIZE = 1 << 24
+DISCARD_TIMEOUT = 5.0 # Seconds spent reading away a rejected body so the client sees the response
+
+class RequestError(ValueError):
+    def __init__(self, message:str, status = 400):
+        super().__init__(message)
+        self.status = status
+
+# Request parsing
+
+def parseAddressField(value, name:str) -> int:
+    if not isinstance(value, str):
+        raise RequestError(f'{name} must be a dotted decimal string')
+
+    address = codec.parseAddress(value.encode('ascii', 'replace'))
+    if address == -1:
+        raise RequestError(f'invalid {name} {value!r}')
+    return address
+
+def parsePrefixField(value) -> int:
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0 or value > 32:
+        raise RequestError(f'invalid prefix {value!r}')
+    return value
+
+def parseMask(item:dict) -> int:
+    if 'prefix' in item:
+        return core.PREFIX_MASKS[parsePrefixField(item['prefix'])]
+
+    mask = parseAddressField(item.get('mask'), 'mask')
+    if core.prefixFromMask(mask) == -1:
+        raise RequestError(f'invalid subnet mask {item["mask"]!r}')
+    return mask
+
+def parseContentLength(value:str) -> int:
+    value = value.strip()
+    if not (value.isascii() and value.isdigit()):
+        raise RequestError(f'invalid Content-Length {value!r}')
+    return int(value)
+
+def parseNetworkItem(item) -> tuple[int, int]:
+    if not isinstance(item, dict):
+        raise RequestError('expected an object')
+    return parseAddressField(item.get('address'), 'address'), parseMask(item)
+
+# Handlers
+
+def calculateNetworks(items:[]) -> []:
+    addresses = [address for address, _ in items]
+    masks = [mask for _, mask in items]
+    result = batch.calculate(addresses, masks=masks)
+
+    formatAddress = codec.formatAddress
+    return [
+        {
+            'network': formatAddress(network),
+            'broadcast': formatAddress(broadcast),
+            'first': formatAddress(first),
+            'last': formatAddress(last),
+            'count': count,
+            'prefix': core.prefixFromMask(mask),
+        }
+        for network, broadcast, first, last, count, mask in zip(
+            result.networkAddress.tolist(), result.broadcastAddress.tolist(),
+            result.firstAddress.tolist(), result.lastAddress.tolist(),
+            result.addressCount.tolist(), masks)
+    ]
+
+def convertMask(item) -> dict:
+    if not isinstance(item, dict):
+        raise RequestError('expected an object')
+
+    mask = parseMask(item)
+    return {
+        'prefix': core.prefixFromMask(mask),
+        'mask': codec.formatAddress(mask),
+        'binary': codec.formatAddress(mask, True),
+        'wildcard': codec.formatAddress(mask ^ core.ALL_ONES),
+    }
+
+def findSize(item) -> dict:
+    hosts = item.get('hosts') if isinstance(item, dict) else None
+    if not isinstance(hosts, int) or isinstance(hosts, bool) or hosts < 0:
+        raise RequestError(f'invalid hosts {hosts!r}')
+
+    prefix = vlsm.prefixForHosts(hosts)
+    if prefix < 0:
+        raise RequestError(f'{hosts} hosts do not fit in an IPv4 network')
+
+    return {'prefix': prefix, 'mask': codec.formatAddress(core.PREFIX_MASKS[prefix]), 'addresses': core.HOST_MASKS[prefix] + 1}
+
+class Batcher:
+    # Collects items from concurrent requests and hands them to handler in
+    # batches of at most maxBatch. After the first request of a batch arrives
+    # the batcher yields to the event loop (or sleeps maxDelay seconds) so the
+    # requests already read from other connections join the same batch.
+
+    def __init__(self, handler, maxBatch = DEFAULT_MAX_BATCH, maxDelay = DEFAULT_MAX_DELAY):
+        self.handler = handler
+        self.maxBatch = maxBatch
+        self.maxDelay = maxDelay
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, items:[]) -> []:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((items, future))
+        return await future
+
+    async def run(self):
+        while True:
+            pending = [await self.queue.get()]
+            size = len(pending[0][0])
+            await asyncio.sleep(self.maxDelay)
+
+            while size < self.maxBatch and not self.queue.empty():
+                entry = self.queue.get_nowait()
+                pending.append(entry)
+                size += len(entry[0])
+
+            self.dispatch(pending)
+
+    def dispatch(self, pending:[]):
+        items = [item for requestItems, _ in pending for item in requestItems]
+        self.batches += 1
+        self.items += len(items)
+
+        try:
+            results = self.handler(items)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for requestItems, future in pending:
+            if not future.done():
+                future.set_result(results[offset:offset + len(requestItems)])
+            offset += len(requestItems)
+
+class CalculationService:
+    def __init__(self, maxBatch = DEFAULT_MAX_BATCH, maxDelay = DEFAULT_MAX_DELAY):
+        self.batcher = Batcher(calculateNetworks, maxBatch, maxDelay)
+        self.requests = 0
+
+    async def handle(self, method:str, path:str, body:bytes):
+        self.requests += 1
+
+        if path == '/health':
+            return {'status': 'ok', 'requests': self.requests, 'batches': self.batcher.batches, 'items': self.batcher.items}
+
+        if method != 'POST':
+            raise RequestError(f'{method} is not supported on {path}', 405)
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            raise RequestError('body is not valid JSON') from None
+
+        if path == '/network':
+            if isinstance(payload, list):
+                return await self.batcher.submit([parseNetworkItem(item) for item in payload])
+            return (await self.batcher.submit([parseNetworkItem(payload)]))[0]
+        if path == '/mask':
+            return convertMask(payload)
+        if path == '/size':
+            return findSize(payload)
+
+        raise RequestError(f'unknown endpoint {path}', 404)
+
+    async def serveConnection(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter):
+        try:
+            while True:
+                requestLine = await reader.readline()
+                if not requestLine:
+                    break
+
+                method, path, version = requestLine.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = parseContentLength(headers.get('content-length', '0'))
+                except RequestError as e:
+                    # The body cannot be skipped without its length, the connection ends here
+                    await self.writeResponse(writer, e.status, {'error': str(e)}, False)
+                    break
+                if length > MAX_BODY_SIZE:
+                    error = RequestError(f'body of {length} bytes is larger than {MAX_BODY_SIZE}', 413)
+                    await self.writeResponse(writer, error.status, {'error': str(error)}, False)
+                    await self.discardBody(reader, length)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                try:
+                    status, response = 200, await self.handle(method, path, body)
+                except RequestError as e:
+                    status, response = e.status, {'error': str(e)}
+
+                keepAlive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                await self.writeResponse(writer, status, response, keepAlive)
+
+                if not keepAlive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def writeResponse(writer:asyncio.StreamWriter, status:int, response, keepAlive:bool):
+        encoded = json.dumps(response).encode('utf-8')
+        writer.write(
+            f'HTTP/1.1 {status} {http.client.responses.get(status, "")}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(encoded)}\r\n'
+            f'Connection: {"keep-alive" if keepAlive else "close"}\r\n\r\n'.encode('latin-1') + encoded)
+        await writer.drain()
+
+    @staticmethod
+    async def discardBody(reader:asyncio.StreamReader, length:int):
+        # A client still sending would get a reset instead of the response
+        # if the socket closed with its body unread
+        async def discard():
+            remaining = length
+            while remaining > 0:
+                chunk = await reader.read(min(remaining, 1 << 16))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+
+        try:
+            await asyncio.wait_for(discard(), DISCARD_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+
+    async def serve(self, host = '127.0.0.1', port = DEFAULT_PORT, unixPath = None):
+        servers = []
+        if port:
+            servers.append(await asyncio.start_server(self.serveConnection, host, port))
+        if unixPath:
+            servers.append(await asyncio.start_unix_server(self.serveConnection, unixPath))
+
+        batcherTask = asyncio.create_task(self.batcher.run())
+        try:
+            await asyncio.gather(*(server.serve_forever() for server in servers))
+        finally:
+            batcherTask.cancel()
+
+# Client
+
+class TCPHTTPConnection(http.client.HTTPConnection):
+    # http.client sends headers and body in separate writes, so Nagle's
+    # algorithm would hold the body back until the server acknowledges
+    def connect(self):
+        super().connect()
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path:str, timeout = None):
+        super().__init__('localhost', timeout=timeout)
+        self.unixPath = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unixPath)
+
+class ServiceClient:
+    # Keeps one persistent connection open for all requests
+
+    def __init__(self, host = '127.0.0.1', port = DEFAULT_PORT, unixPath = None, timeout = 10):
+        if unixPath:
+            self.connection = UnixHTTPConnection(unixPath, timeout)
+        else:
+            self.connection = TCPHTTPConnection(host, port, timeout=timeout)
+
+    def request(self, path:str, payload = None):
+        body = None if payload is None else json.dumps(payload)
+        self.connection.request('GET' if body is None else 'POST', path, body, {'Content-Type': 'application/json'})
+        response = self.connection.getresponse()
+        result = json.loads(response.read())
+        if response.status != 200:
+            raise RequestError(result.get('error', response.reason), response.status)
+        return result
+
+    def network(self, address:str, prefix = None, mask = None):
+        return self.request('/network', {'address': address, 'prefix': prefix} if mask is None else {'address': address, 'mask': mask})
+
+    def networks(self, items:[]) -> []:
+        return self.request('/network', items)
+
+    def mask(self, prefix = None, mask = None):
+        return self.request('/mask', {'prefix': prefix} if mask is None else {'mask': mask})
+
+    def size(self, hosts:int):
+        return self.request('/size', {'hosts': hosts})
+
+    def close(self):
+        self.connection.close()
+
+def main(argv = None) -> int:
+    parser = argparse.ArgumentParser(description='Serve IP calculations as JSON over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='TCP port, 0 to disable')
+    parser.add_argument('--unix', dest='unixPath', help='also listen on this Unix socket')
+    parser.add_argument('--max-batch', dest='maxBatch', type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument('--max-delay', dest='maxDelay', type=float, default=DEFAULT_MAX_DELAY,
+                        help='seconds to wait for more requests before calculating a batch, 0 only yields to the event loop')
+    args = parser.parse_args(argv)
+
+    if not args.port and not args.unixPath:
+        parser.error('nothing to listen on')
+
+    service = CalculationService(args.maxBatch, args.maxDelay)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unixPath))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
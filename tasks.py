@@ -0,0 +1,146 @@
+import time
+
+from PySide6 import QtCore
+from PySide6.QtCore import Qt
+
+# Runs calculations on a QThreadPool so the window keeps painting while they
+# run. Each widget owns a TaskRunner; submitting to a runner supersedes what
+# it was doing: the running task is asked to stop, only the most recent
+# request is kept waiting, and results of superseded tasks are dropped.
+# Workers never touch widgets, everything comes back as queued signals.
+#
+# Task functions get a TaskContext as their first argument. Long running
+# ones call context.checkCancelled() and context.progress() as they go.
+
+PROGRESS_INTERVAL = 1 / 60 # Progress is reported at most once per frame
+
+class Cancelled(Exception):
+    pass
+
+class TaskContext:
+    __slots__ = ('generation', 'cancelled', '_signals', '_lastProgress')
+
+    def __init__(self, generation:int, signals):
+        self.generation = generation
+        self.cancelled = False # Set from the GUI thread, only ever read by the worker
+        self._signals = signals
+        self._lastProgress = 0.0
+
+    def checkCancelled(self):
+        if self.cancelled:
+            raise Cancelled()
+
+    def progress(self, done:int, total:int):
+        now = time.perf_counter()
+        if now - self._lastProgress >= PROGRESS_INTERVAL or done >= total:
+            self._lastProgress = now
+            self._signals.progress.emit(self.generation, done, total)
+        self.checkCancelled()
+
+class TaskSignals(QtCore.QObject):
+    # Lives in the GUI thread, so emitting from a worker queues the call
+    progress = QtCore.Signal(int, int, int)
+    finished = QtCore.Signal(int, object)
+    failed = QtCore.Signal(int, str)
+    cancelled = QtCore.Signal(int)
+
+class Task(QtCore.QRunnable):
+    def __init__(self, context:TaskContext, function, args:tuple):
+        super().__init__()
+        self.context = context
+        self.function = function
+        self.args = args
+
+    def run(self):
+        signals = self.context._signals
+        generation = self.context.generation
+        try:
+            self.context.checkCancelled()
+            result = self.function(self.context, *self.args)
+        except Cancelled:
+            signals.cancelled.emit(generation)
+        except Exception as e:
+            signals.failed.emit(generation, str(e) or type(e).__name__)
+        else:
+            signals.finished.emit(generation, result)
+
+class TaskRunner(QtCore.QObject):
+    progress = QtCore.Signal(int, int)
+    finished = QtCore.Signal(object)
+    failed = QtCore.Signal(str)
+    busyChanged = QtCore.Signal(bool)
+
+    def __init__(self, parent = None, pool = None):
+        super().__init__(parent)
+        self.pool = pool or QtCore.QThreadPool.globalInstance()
+
+        self.generation = 0
+        self.running = None # Context of the task on the pool
+        self.pending = None # (generation, function, args) waiting for the running task to stop
+
+        self.signals = TaskSignals(self)
+        self.signals.progress.connect(self.onTaskProgress, Qt.ConnectionType.QueuedConnection)
+        self.signals.finished.connect(self.onTaskFinished, Qt.ConnectionType.QueuedConnection)
+        self.signals.failed.connect(self.onTaskFailed, Qt.ConnectionType.QueuedConnection)
+        self.signals.cancelled.connect(self.onTaskCancelled, Qt.ConnectionType.QueuedConnection)
+
+    def isBusy(self) -> bool:
+        return self.running is not None
+
+    def submit(self, function, *args) -> int:
+        self.generation += 1
+        if self.running is None:
+            self._start(self.generation, function, args)
+        else:
+            # The pool slot frees up once the running task notices it was cancelled
+            self.running.cancelled = True
+            self.pending = (self.generation, function, args)
+        return self.generation
+
+    def cancel(self):
+        self.generation += 1
+        self.pending = None
+        if self.running is not None:
+            self.running.cancelled = True
+
+    def wait(self, msecs = -1) -> bool:
+        # Blocks until the pool is idle and the queued results are delivered, for scripts and shutdown
+        done = self.pool.waitForDone(msecs)
+        QtCore.QCoreApplication.sendPostedEvents(self.signals)
+        return done
+
+    def _start(self, generation:int, function, args:tuple):
+        wasBusy = self.running is not None
+        self.running = TaskContext(generation, self.signals)
+        self.pool.start(Task(self.running, function, args))
+        if not wasBusy:
+            self.busyChanged.emit(True)
+
+    def _taskDone(self, generation:int) -> bool:
+        # Starts whatever was submitted meanwhile, returns whether the result is still wanted
+        if self.running is None or self.running.generation != generation:
+            return False
+
+        self.running = None
+        if self.pending is not None:
+            pending, self.pending = self.pending, None
+            self._start(*pending)
+        else:
+            self.busyChanged.emit(False)
+
+        return generation == self.generation
+
+    def onTaskProgress(self, generation:int, done:int, total:int):
+        if generation == self.generation:
+            self.progress.emit(done, total)
+
+    def onTaskFinished(self, generation:int, result):
+        if self._taskDone(generation):
+            self.finished.emit(result)
+
+    def onTaskFailed(self, generation:int, message:str):
+        if self._taskDone(generation):
+            self.failed.emit(message)
+
+    def onTaskCancelled(self, generation:int):
+        self._taskDone(generation)
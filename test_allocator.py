@@ -0,0 +1,33 @@
+import random
+
+import allocator
+
+def heapSizes(buddy:allocator.BuddyAllocator) -> []:
+    return [(len(buddy._heaps[prefix]), len(buddy._free[prefix])) for prefix in range(33)]
+
+def testRepeatedCyclesKeepHeapsBounded():
+    buddy = allocator.BuddyAllocator(10 << 24, 8)
+    for _ in range(10000):
+        network, _ = buddy.allocatePrefix(32)
+        buddy.release(network)
+
+    assert buddy.freeBlocks() == [(10 << 24, 8)]
+    assert sum(heap for heap, _ in heapSizes(buddy)) <= 2 * len(buddy.freeBlocks())
+
+def testRandomCyclesKeepHeapsBounded():
+    rng = random.Random(1)
+    buddy = allocator.BuddyAllocator(10 << 24, 16)
+    live = []
+    for _ in range(20000):
+        if live and rng.random() < 0.5:
+            buddy.release(live.pop(rng.randrange(len(live))))
+        else:
+            result = buddy.allocatePrefix(rng.randint(20, 32))
+            if result:
+                live.append(result[0])
+
+        assert all(heap <= 2 * free for heap, free in heapSizes(buddy))
+
+    for network in live:
+        buddy.release(network)
+    assert buddy.freeBlocks() == [(10 << 24, 16)]
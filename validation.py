@@ -0,0 +1,128 @@
+import numpy as np
+
+import codec
+import core
+
+# Bulk validation of address/mask pairs. Every row gets an error code instead
+# of the first bad row raising or stopping the run. All checks are bit
+# operations on whole uint32 arrays; when a row has several problems the
+# first check in the order below wins.
+
+OK = 0
+MALFORMED = 1 # Text row could not be split into address and mask
+BAD_ADDRESS_OCTET = 2
+BAD_MASK_OCTET = 3
+BAD_PREFIX = 4
+NON_CONTIGUOUS_MASK = 5
+HOST_BITS_SET = 6 # Only checked when the addresses are expected to be network addresses
+
+ERROR_NAMES = {
+    OK: 'ok',
+    MALFORMED: 'malformed',
+    BAD_ADDRESS_OCTET: 'bad address octet',
+    BAD_MASK_OCTET: 'bad mask octet',
+    BAD_PREFIX: 'bad prefix',
+    NON_CONTIGUOUS_MASK: 'non-contiguous mask',
+    HOST_BITS_SET: 'host bits set',
+}
+
+def _setErrors(errors:np.ndarray, condition:np.ndarray, code:int):
+    # Keeps the earlier error when a row already has one
+    errors[condition & (errors == OK)] = code
+
+def octetsValid(octets) -> tuple[np.ndarray, np.ndarray]:
+    # Rows of four octets in any integer dtype, returns (packed, valid)
+    octets = np.asarray(octets).reshape(-1, 4)
+    valid = ((octets >= 0) & (octets <= 255)).all(axis=1)
+    packed = octets.astype(np.uint32) & np.uint32(0xFF)
+    packed = (packed[:, 0] << 24) | (packed[:, 1] << 16) | (packed[:, 2] << 8) | packed[:, 3]
+    return packed, valid
+
+def contiguousMasks(masks) -> np.ndarray:
+    # A mask is contiguous exactly when ~mask + 1 is a power of two (or wraps to zero for /0)
+    masks = np.asarray(masks, dtype=np.uint32)
+    x = ~masks + np.uint32(1)
+    return (x & (x - np.uint32(1))) == 0
+
+def validatePacked(addresses, masks, requireNetwork = False) -> np.ndarray:
+    addresses = np.asarray(addresses, dtype=np.uint32)
+    masks = np.asarray(masks, dtype=np.uint32)
+
+    errors = np.zeros(addresses.shape, dtype=np.uint8)
+    _setErrors(errors, ~contiguousMasks(masks), NON_CONTIGUOUS_MASK)
+    if requireNetwork:
+        _setErrors(errors, (addresses & ~masks) != 0, HOST_BITS_SET)
+
+    return errors
+
+def validateOctets(addressOctets, maskOctets = None, prefixes = None, requireNetwork = False) -> np.ndarray:
+    if (maskOctets is None) == (prefixes is None):
+        raise ValueError('exactly one of maskOctets or prefixes must be given')
+
+    addresses, addressValid = octetsValid(addressOctets)
+    errors = np.zeros(addresses.shape, dtype=np.uint8)
+    _setErrors(errors, ~addressValid, BAD_ADDRESS_OCTET)
+
+    if maskOctets is not None:
+        masks, maskValid = octetsValid(maskOctets)
+        _setErrors(errors, ~maskValid, BAD_MASK_OCTET)
+    else:
+        prefixes = np.asarray(prefixes).ravel()
+        prefixValid = (prefixes >= 0) & (prefixes <= 32)
+        _setErrors(errors, ~prefixValid, BAD_PREFIX)
+        masks = np.array(core.PREFIX_MASKS, dtype=np.uint32)[np.where(prefixValid, prefixes, 0)]
+
+    packedErrors = validatePacked(addresses, masks, requireNetwork)
+    valid = errors == OK
+    errors[valid] = packedErrors[valid]
+
+    return errors
+
+def validateText(buffer:bytes, requireNetwork = False) -> np.ndarray:
+    # Newline separated "ip/mask" or "ip/prefix" rows. Splitting the text is
+    # done per row by the codec, the checks themselves are vectorized.
+    rows = buffer.split(b'\n')
+    if rows and not rows[-1].strip():
+        rows.pop()
+
+    count = len(rows)
+    addresses = np.zeros(count, dtype=np.uint32)
+    masks = np.zeros(count, dtype=np.uint32)
+    errors = np.zeros(count, dtype=np.uint8)
+
+    prefixMasks = core.PREFIX_MASKS
+    for i, row in enumerate(rows):
+        address, separator, mask = row.partition(b'/')
+        if not separator:
+            errors[i] = MALFORMED
+            continue
+
+        packed = codec.parseAddress(address)
+        if packed == -1:
+            errors[i] = BAD_ADDRESS_OCTET
+            continue
+        addresses[i] = packed
+
+        mask = mask.strip()
+        if b'.' in mask:
+            packed = codec.parseAddress(mask)
+            if packed == -1:
+                errors[i] = BAD_MASK_OCTET
+                continue
+            masks[i] = packed
+        else:
+            prefix = codec.DECIMAL_BYTE_VALUES.get(mask, -1)
+            if prefix < 0 or prefix > 32:
+                errors[i] = BAD_PREFIX
+                continue
+            masks[i] = prefixMasks[prefix]
+
+    packedErrors = validatePacked(addresses, masks, requireNetwork)
+    valid = errors == OK
+    errors[valid] = packedErrors[valid]
+
+    return errors
+
+def summarize(errors:np.ndarray) -> dict:
+    counts = np.bincount(errors, minlength=len(ERROR_NAMES))
+    return {ERROR_NAMES[code]: int(count) for code, count in enumerate(counts) if count}
@@ -0,0 +1,93 @@
+import typing
+
+import addressset
+import core
+
+# Variable length subnet planning. Requirements are packed into a parent block
+# largest first. Every block is a power of two and blocks are handed out in
+# decreasing size, so the next free address is always aligned for the next
+# block and the allocated space has no gaps.
+
+MIN_HOST_BITS = 2 # Smallest block that still has a usable address besides network and broadcast
+
+class Requirement(typing.NamedTuple):
+    name: str
+    hosts: int
+
+class Assignment(typing.NamedTuple):
+    name: str
+    hosts: int
+    network: int
+    prefix: int
+
+    @property
+    def broadcast(self) -> int:
+        return self.network | core.HOST_MASKS[self.prefix]
+
+    def __str__(self):
+        return f'{self.name}: {core.IPv4Network(self.network, self.prefix)} ({self.hosts} hosts)'
+
+class Plan(typing.NamedTuple):
+    assignments: []
+    unassigned: []
+    free: []
+
+    @property
+    def freeAddresses(self) -> int:
+        return sum(core.HOST_MASKS[prefix] + 1 for _, prefix in self.free)
+
+def prefixForHosts(hostsNum:int) -> int:
+    hostBits = core.hostBitsForHosts(hostsNum)
+    if hostBits == -1:
+        return -1
+
+    return 32 - max(hostBits, MIN_HOST_BITS)
+
+def planSubnets(network:int, prefix:int, requirements) -> Plan:
+    if prefix < 0 or prefix > 32:
+        raise ValueError(f'{prefix} is not a valid prefix length')
+
+    start = network & core.PREFIX_MASKS[prefix]
+    end = start | core.HOST_MASKS[prefix]
+
+    sized = []
+    unassigned = []
+    for requirement in requirements:
+        requirement = Requirement(*requirement)
+        requiredPrefix = prefixForHosts(requirement.hosts)
+        if requiredPrefix < prefix:
+            unassigned.append(requirement)
+        else:
+            sized.append((requiredPrefix, requirement))
+
+    sized.sort(key=lambda item: item[0])
+
+    assignments = []
+    cursor = start
+    for requiredPrefix, requirement in sized:
+        blockSize = core.HOST_MASKS[requiredPrefix] + 1
+        if cursor + blockSize - 1 > end:
+            unassigned.append(requirement)
+            continue
+
+        assignments.append(Assignment(requirement.name, requirement.hosts, cursor, requiredPrefix))
+        cursor += blockSize
+
+    free = addressset.rangeToNetworks(cursor, end) if cursor <= end else []
+
+    return Plan(assignments, unassigned, free)
+
+def parseRequirements(lines) -> []:
+    # One "name hosts" pair per line, blank lines and # comments are ignored
+    requirements = []
+    for lineNumber, line in enumerate(lines, 1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+
+        name, _, hosts = line.rpartition(' ')
+        if not name or not hosts.isdigit():
+            raise ValueError(f'line {lineNumber}: expected "name hosts"')
+        requirements.append(Requirement(name.strip(), int(hosts)))
+
+    return requirements
@@ -1,11 +1,20 @@
 import math
+import time
 
 from PySide6 import QtCore, QtWidgets, QtGui
 from PySide6.QtCore import Qt
+import codec
 import core
+import enumeration
+import instrument
+import tasks
+import vlsm
 
 class MainWindow(QtWidgets.QMainWindow):
-    def __init__(self):
+    groupBuilt = QtCore.Signal(str, float)
+    allGroupsBuilt = QtCore.Signal()
+
+    def __init__(self, lazy = True):
         super().__init__()
         self.setWindowTitle("IP Calculator")
         centralWidget = QtWidgets.QWidget()
@@ -16,12 +25,103 @@ class MainWindow(QtWidgets.QMainWindow):
         topRight = Qt.AlignmentFlag.AlignRight|Qt.AlignmentFlag.AlignTop
         bottomRight = Qt.AlignmentFlag.AlignRight|Qt.AlignmentFlag.AlignBottom
 
-        layout.addWidget(AddressConverterGroup(), 0, 0, topRight)
-        layout.addWidget(NetworkInfoGroup(), 0, 1, topLeft)
-        layout.addWidget(NetworkSizeFinderGroup(), 1, 0, topRight)
+        # Groups are built one per event loop turn after the window is shown
+        self.groups = [
+            LazyWidget(AddressConverterGroup),
+            LazyWidget(NetworkInfoGroup),
+            LazyWidget(NetworkSizeFinderGroup),
+            LazyWidget(SubnetPlannerGroup),
+            LazyWidget(ResultsGroup),
+        ]
+
+        layout.addWidget(self.groups[0], 0, 0, topRight)
+        layout.addWidget(self.groups[1], 0, 1, topLeft)
+        layout.addWidget(self.groups[2], 1, 0, topRight)
+        layout.addWidget(self.groups[3], 1, 1, topLeft)
+        layout.addWidget(self.groups[4], 2, 0, 1, 2)
 
         self.setCentralWidget(centralWidget)
 
+        if instrument.ENABLED:
+            self.repaintProbe = RepaintProbe()
+            QtWidgets.QApplication.instance().installEventFilter(self.repaintProbe)
+
+            self.statusTimer = QtCore.QTimer(self)
+            self.statusTimer.timeout.connect(self.updateInstrumentationStatus)
+            self.statusTimer.start(1000)
+
+        if not lazy:
+            self.buildAllGroups()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        QtCore.QTimer.singleShot(0, self.buildNextGroup)
+
+    def buildNextGroup(self):
+        for group in self.groups:
+            if not group.isBuilt():
+                self.buildGroup(group)
+                QtCore.QTimer.singleShot(0, self.buildNextGroup)
+                return
+
+    def buildAllGroups(self):
+        for group in self.groups:
+            if not group.isBuilt():
+                self.buildGroup(group)
+
+    def buildGroup(self, group):
+        started = time.perf_counter()
+        group.build()
+        self.groupBuilt.emit(group.factory.__name__, time.perf_counter() - started)
+
+        if all(g.isBuilt() for g in self.groups):
+            self.allGroupsBuilt.emit()
+
+
+    def updateInstrumentationStatus(self):
+        snapshot = instrument.snapshot()
+        coreCalls = sum(entry['count'] for name, entry in snapshot.items() if name.startswith('core.'))
+        repaints = [(name, entry) for name, entry in snapshot.items() if name.endswith('.toRepaint')]
+
+        message = f'core calls: {coreCalls}'
+        for name, entry in repaints:
+            message += f' | {name[:-len(".toRepaint")]}: p50 {entry["p50Us"] / 1000:.1f} ms, p99 {entry["p99Us"] / 1000:.1f} ms'
+        self.statusBar().showMessage(message)
+
+
+class RepaintProbe(QtCore.QObject):
+    # Finishes pending event to repaint timings on the first paint after them
+    def eventFilter(self, watched, event):
+        if event.type() == QtCore.QEvent.Type.Paint and instrument.hasPendingMarks():
+            instrument.completeMarks()
+        return False
+
+
+class LazyWidget(QtWidgets.QWidget):
+    def __init__(self, factory):
+        super().__init__()
+        self.factory = factory
+        self.widget = None
+
+        self.layout = QtWidgets.QVBoxLayout(self)
+        self.layout.setContentsMargins(0, 0, 0, 0)
+
+    def isBuilt(self) -> bool:
+        return self.widget is not None
+
+    def build(self):
+        if self.widget is None:
+            self.widget = self.factory()
+            self.layout.addWidget(self.widget)
+
+        return self.widget
+
+
+def ResultsGroup():
+    # numpy and the table model are only imported once the group is built
+    import resultstable
+    return resultstable.ResultsGroup()
+
 
 def QLineEditAsIpAddress():
     line = QtWidgets.QLineEdit()
@@ -73,6 +173,10 @@ class NetworkSizeFinderGroup(QtWidgets.QWidget):
         btn.setStyleSheet("background-color: darkcyan")
         gridLayout.addWidget(btn, 3, 0, 1, 2)
 
+        self.markStarted = 0 # Click time of the calculation in flight, see instrument.timedResultSlot
+        self.tasks = tasks.TaskRunner(self)
+        self.tasks.finished.connect(self.onCalculated)
+
         btn.clicked.connect(lambda: self.onButtonClicked())
 
     def onButtonClicked(self):
@@ -80,11 +184,16 @@ class NetworkSizeFinderGroup(QtWidgets.QWidget):
         self.txtSubnetMask.clear()
 
         if (self.txtDevicesNum.text() == ''):
+            self.markStarted = 0
+            self.tasks.cancel()
             return
 
-        addressClass = self.cbAddressClass.currentText()
-        hostsNum = int(self.txtDevicesNum.text())
+        self.markStarted = instrument.startMark()
+        self.tasks.submit(self.calculate, self.cbAddressClass.currentText(), int(self.txtDevicesNum.text()))
 
+    @staticmethod
+    def calculate(context, addressClass:str, hostsNum:int):
+        # Runs on the thread pool, returns (network address, prefix) or None
         networkAddress = ""
         maxHostBits = 0
         if addressClass == 'A':
@@ -97,27 +206,96 @@ class NetworkSizeFinderGroup(QtWidgets.QWidget):
             networkAddress = "192.168.0.0"
             maxHostBits = 8
 
-        maxHosts = pow(2, maxHostBits)
+        hostBits = core.hostBitsForHosts(hostsNum)
 
-        if (hostsNum > maxHosts):
-            return # cannot fit hosts in this address class
-
-        hostBits = 0
-        for i in range(1, maxHostBits + 1):
-            if pow(2, i) - 2 >= hostsNum :
-                hostBits = i
-                break
+        if hostBits > maxHostBits:
+            return None # cannot fit hosts in this address class
 
         if hostBits < 2:
-            return #No avaliable addreses left besides network and broadcast
+            return None #No avaliable addreses left besides network and broadcast
 
-        networkBits = 32 - hostBits
+        return networkAddress, 32 - hostBits
 
+    @instrument.timedResultSlot('NetworkSizeFinderGroup.onButtonClicked')
+    def onCalculated(self, result):
+        if result is None:
+            return
+
+        networkAddress, networkBits = result
         self.txtNetworkAddress.setText(networkAddress)
         self.txtSubnetMask.setText(str(networkBits))
 
 
 
+class SubnetPlannerGroup(QtWidgets.QWidget):
+    def __init__(self):
+        super().__init__()
+
+        layout = QtWidgets.QGridLayout()
+        self.setLayout(layout)
+
+        groupbox = QtWidgets.QGroupBox("Subnet Planner")
+        layout.addWidget(groupbox)
+
+        gridLayout = QtWidgets.QGridLayout()
+        groupbox.setLayout(gridLayout)
+
+        self.txtParentNetwork = QtWidgets.QLineEdit()
+        self.txtParentNetwork.setPlaceholderText('10.0.0.0/8')
+
+        gridLayout.addWidget(QtWidgets.QLabel('Parent network:'), 0, 0, Qt.AlignmentFlag.AlignRight)
+        gridLayout.addWidget(self.txtParentNetwork, 0, 1, Qt.AlignmentFlag.AlignLeft)
+
+        self.txtRequirements = QtWidgets.QPlainTextEdit()
+        self.txtRequirements.setPlaceholderText('name hosts\noffice 120\nlab 30')
+        self.txtRequirements.setMaximumHeight(100)
+
+        gridLayout.addWidget(QtWidgets.QLabel('Subnets:'), 1, 0, Qt.AlignmentFlag.AlignRight|Qt.AlignmentFlag.AlignTop)
+        gridLayout.addWidget(self.txtRequirements, 1, 1)
+
+        btn = QtWidgets.QPushButton("Calculate")
+        btn.setStyleSheet("background-color: darkcyan")
+        gridLayout.addWidget(btn, 2, 0, 1, 2)
+
+        self.txtPlan = QtWidgets.QPlainTextEdit()
+        self.txtPlan.setReadOnly(True)
+        gridLayout.addWidget(self.txtPlan, 3, 0, 1, 2)
+
+        self.markStarted = 0
+        self.tasks = tasks.TaskRunner(self)
+        self.tasks.finished.connect(self.onCalculated)
+        self.tasks.failed.connect(self.onCalculated)
+
+        btn.clicked.connect(lambda: self.onButtonClicked())
+
+    def onButtonClicked(self):
+        self.txtPlan.clear()
+        self.markStarted = instrument.startMark()
+        self.tasks.submit(self.calculate, self.txtParentNetwork.text(), self.txtRequirements.toPlainText())
+
+    @instrument.timedResultSlot('SubnetPlannerGroup.onButtonClicked')
+    def onCalculated(self, text:str):
+        # The plan or the error message
+        self.txtPlan.setPlainText(text)
+
+    @staticmethod
+    def calculate(context, parentNetwork:str, requirements:str) -> str:
+        # Runs on the thread pool, a ValueError message ends up in the plan box
+        parent = core.IPv4Network.fromString(parentNetwork.strip())
+        requirements = vlsm.parseRequirements(requirements.splitlines())
+        context.checkCancelled()
+
+        plan = vlsm.planSubnets(parent.networkAddress, parent.prefix, requirements)
+        context.checkCancelled()
+
+        lines = [str(assignment) for assignment in plan.assignments]
+        for requirement in plan.unassigned:
+            lines.append(f'{requirement.name}: does not fit ({requirement.hosts} hosts)')
+        lines.append(f'Free: {plan.freeAddresses} addresses')
+        lines.extend(str(core.IPv4Network(network, prefix)) for network, prefix in plan.free)
+
+        return '\n'.join(lines)
+
 class NetworkInfoGroup(QtWidgets.QWidget):
     def __init__(self):
         super().__init__()
@@ -172,12 +350,27 @@ class NetworkInfoGroup(QtWidgets.QWidget):
         btn.setStyleSheet("background-color: darkcyan")
         boxLayout.addWidget(btn, 5, 0, 1, 2)
 
+        self.hostPager = AddressPager()
+        boxLayout.addWidget(QtWidgets.QLabel("Hosts:"), 6, 0, Qt.AlignmentFlag.AlignRight|Qt.AlignmentFlag.AlignTop)
+        boxLayout.addWidget(self.hostPager, 6, 1, Qt.AlignmentFlag.AlignLeft)
+
+        self.markStarted = 0
+        self.tasks = tasks.TaskRunner(self)
+        self.tasks.finished.connect(self.onCalculated)
+
         btn.clicked.connect(lambda: self.onButtonClicked())
 
     def onButtonClicked(self):
+        self.markStarted = instrument.startMark()
+        self.tasks.submit(self.calculate, self.ipAddress.getIpAddress(), self.subnetMask.getMask())
 
-        ip = self.ipAddress.getIpAddress()
-        subnet = self.subnetMask.getMask()
+    @staticmethod
+    def calculate(context, ip:[], subnet:[]) -> tuple:
+        # Runs on the thread pool, returns the host view and the texts of the result fields
+        hosts = None
+        if core.isValidIpAddress(ip) and core.isValidSubnetMask(subnet):
+            network = core.IPv4Network(core.packIpAddress(ip), core.networkBitsInSubnetMask(subnet))
+            hosts = enumeration.hosts(network)
 
         networkAddress = core.calculateNetworkAddress(ip, subnet)
         broadcastAddress = core.calculateBroadcastAddress(ip, subnet)
@@ -190,12 +383,76 @@ class NetworkInfoGroup(QtWidgets.QWidget):
             minAddress[i] = format(minAddress[i], 'd')
             maxAddress[i] = format(maxAddress[i], 'd')
 
-        self.networkAddress.setText('.'.join(networkAddress))
-        self.broadcastAddress.setText('.'.join(broadcastAddress))
-        self.minAddress.setText('.'.join(minAddress))
-        self.maxAddress.setText('.'.join(maxAddress))
+        return (hosts, '.'.join(networkAddress), '.'.join(broadcastAddress),
+                '.'.join(minAddress), '.'.join(maxAddress), str(addresses))
+
+    @instrument.timedResultSlot('NetworkInfoGroup.onButtonClicked')
+    def onCalculated(self, result:tuple):
+        hosts, networkAddress, broadcastAddress, minAddress, maxAddress, addresses = result
+
+        self.hostPager.setView(hosts)
+        self.networkAddress.setText(networkAddress)
+        self.broadcastAddress.setText(broadcastAddress)
+        self.minAddress.setText(minAddress)
+        self.maxAddress.setText(maxAddress)
+        self.addressRangeQuantity.setText(addresses)
+
+class AddressPager(QtWidgets.QWidget):
+    # Shows one page of a lazy address view at a time, only the visible page is ever materialized
+    pageSize = 16
+
+    def __init__(self):
+        super().__init__()
+
+        self.view = None
+        self.page = 0
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.txtPage = QtWidgets.QPlainTextEdit()
+        self.txtPage.setReadOnly(True)
+        self.txtPage.setMinimumWidth(150)
+        self.txtPage.setMaximumHeight(120)
+        layout.addWidget(self.txtPage)
+
+        navigation = QtWidgets.QHBoxLayout()
+        self.btnPrevious = QtWidgets.QPushButton("<")
+        self.btnNext = QtWidgets.QPushButton(">")
+        self.lblPage = QtWidgets.QLabel()
+        navigation.addWidget(self.btnPrevious)
+        navigation.addWidget(self.lblPage)
+        navigation.addWidget(self.btnNext)
+        layout.addLayout(navigation)
+
+        self.btnPrevious.clicked.connect(lambda: self.showPage(self.page - 1))
+        self.btnNext.clicked.connect(lambda: self.showPage(self.page + 1))
+
+        self.showPage(0)
+
+    def pageCount(self) -> int:
+        if self.view is None:
+            return 0
+        return (len(self.view) + self.pageSize - 1) // self.pageSize
+
+    def setView(self, view):
+        self.view = view
+        self.showPage(0)
 
-        self.addressRangeQuantity.setText(str(addresses))
+    def showPage(self, page:int):
+        pages = self.pageCount()
+        self.page = max(0, min(page, pages - 1))
+
+        if pages == 0:
+            self.txtPage.clear()
+            self.lblPage.setText('')
+        else:
+            start = self.page * self.pageSize
+            self.txtPage.setPlainText('\n'.join(str(item) for item in self.view[start:start + self.pageSize]))
+            self.lblPage.setText(f'{self.page + 1} / {pages}')
+
+        self.btnPrevious.setEnabled(self.page > 0)
+        self.btnNext.setEnabled(self.page < pages - 1)
 
 class AddressConverterGroup(QtWidgets.QWidget):
     def __init__(self):
@@ -222,13 +479,10 @@ class AddressConverter(QtWidgets.QWidget):
 
         hBox = QtWidgets.QHBoxLayout(self)
 
-        self.ipWidget = IPv4()
-        # self.ipWidget.addOctetChangedHandler(self.onOctetChanged)
-        self.ipWidget.addOctetValueChangedHandler(self.onDecOctetValueChanged)
-
-        self.ipBinaryWidget = IPv4(binaryMode=True)
-        # self.ipBinaryWidget.addOctetChangedHandler(self.onOctetChanged)
-        self.ipBinaryWidget.addOctetValueChangedHandler(self.onBinOctetValueChanged)
+        # Both views edit the same address, neither one writes into the other
+        self.model = AddressModel(self)
+        self.ipWidget = IPv4(model=self.model)
+        self.ipBinaryWidget = IPv4(binaryMode=True, model=self.model)
 
         convertIcon = QtWidgets.QLabel()
         convertIcon.setText('<-\n->')
@@ -237,11 +491,83 @@ class AddressConverter(QtWidgets.QWidget):
         hBox.addWidget(convertIcon)
         hBox.addWidget(self.ipBinaryWidget)
 
-    def onDecOctetValueChanged(self, octetOrdinal, octetValue):
-        self.ipBinaryWidget.setOctetValue(octetOrdinal, octetValue)
+class AddressModel(QtCore.QObject):
+    # One address shared by the views that show it, kept packed. Edits mark
+    # the octets they touch as dirty and changed is emitted once on the next
+    # event loop tick with the mask of every octet changed since, so a paste
+    # or a burst of keystrokes costs the views a single refresh.
+    changed = QtCore.Signal(int) # Bit i set when octet i (0 is the first) changed
+
+    def __init__(self, parent = None):
+        super().__init__(parent)
+        self.value = 0
+        self.invalid = 0 # Octets whose editor text is not a valid octet, same bit layout
+        self.dirty = 0
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self.flush)
+
+    def octet(self, index:int) -> int:
+        if self.invalid >> index & 1:
+            return -1
+        return self.value >> (24 - 8 * index) & 0xFF
+
+    def octets(self) -> []:
+        return [self.octet(i) for i in range(4)]
+
+    def isValid(self) -> bool:
+        return not self.invalid
+
+    def setOctet(self, index:int, octet:int):
+        bit = 1 << index
+        if core.isValidIpOctet(octet):
+            shift = 24 - 8 * index
+            value = self.value & ~(0xFF << shift) | octet << shift
+            invalid = self.invalid & ~bit
+        else:
+            # The value keeps the last valid octet, the mirror views keep showing it
+            value = self.value
+            invalid = self.invalid | bit
+        self._update(value, invalid)
+
+    def setValue(self, value:int):
+        self._update(value & core.ALL_ONES, 0)
+
+    def setOctets(self, octets:[]):
+        value = self.value
+        invalid = 0
+        for i in range(4):
+            if core.isValidIpOctet(octets[i]):
+                shift = 24 - 8 * i
+                value = value & ~(0xFF << shift) | octets[i] << shift
+            else:
+                invalid |= 1 << i
+        self._update(value, invalid)
+
+    def _update(self, value:int, invalid:int):
+        changedBits = value ^ self.value
+        dirty = self.invalid ^ invalid
+        for i in range(4):
+            if changedBits >> (24 - 8 * i) & 0xFF:
+                dirty |= 1 << i
+        if not dirty:
+            return
+
+        self.value = value
+        self.invalid = invalid
+        self.dirty |= dirty
+        if not self._timer.isActive():
+            self._timer.start()
 
-    def onBinOctetValueChanged(self, octetOrdinal, octetValue):
-        self.ipWidget.setOctetValue(octetOrdinal, octetValue)
+    def flush(self):
+        # Emits pending changes now, views call this when they need them before the next tick
+        self._timer.stop()
+        dirty = self.dirty
+        self.dirty = 0
+        if dirty:
+            self.changed.emit(dirty)
 
 class IPv4Octet(QtWidgets.QLineEdit):
     @classmethod
@@ -262,30 +588,30 @@ class IPv4Octet(QtWidgets.QLineEdit):
         self.textEdited.connect(lambda: self.onTextEdited())
 
     def onTextEdited(self):
-        parsed = core.parseOctet(self.text(), self.binaryMode)
+        parsed = codec.parseOctet(self.text(), self.binaryMode)
         self.valueChanged.emit(parsed)
 
     def getValue(self) -> int:
-        parsed = core.parseOctet(self.text(), self.binaryMode)
+        parsed = codec.parseOctet(self.text(), self.binaryMode)
         return parsed
 
     def setValue(self, value:int, notify = False):
-        serialized = core.serializeOctet(value, self.binaryMode)
+        serialized = codec.serializeOctet(value, self.binaryMode)
         self.setText(serialized)
 
         if notify:
             self.valueChanged.emit(value)
 
     def keyPressEvent(self, event):
-        if event.modifiers() == QtCore.Qt.KeyboardModifier.ControlModifier and event.key() == QtCore.Qt.Key.Key_V:
+        if isShortcut(event, QtCore.Qt.Key.Key_V):
             text = QtGui.QGuiApplication.clipboard().text()
 
-            if core.parseOctet(text, self.binaryMode) != -1:
+            if codec.parseOctet(text, self.binaryMode) != -1:
                 self.setText(text)
                 self.textEdited.emit(self.getValue())
             else:
                 self.parent().keyPressEvent(event)
-        elif event.modifiers() == QtCore.Qt.KeyboardModifier.ControlModifier and event.key() == QtCore.Qt.Key.Key_C:
+        elif isShortcut(event, QtCore.Qt.Key.Key_C):
             if not self.hasSelectedText():
                 self.parent().keyPressEvent(event)
             else:
@@ -316,11 +642,13 @@ class IPv4BinaryOctet(IPv4Octet):
         self.setText('00000000')
 
 class IPv4(QtWidgets.QWidget):
-    def __init__(self, binaryMode = False):
+    # A view of an AddressModel, its own unless one is passed in to share
+    def __init__(self, binaryMode = False, model = None):
         super().__init__()
 
         self.binaryMode = binaryMode
-        self.octetChangedHandlers = []
+        self.model = model or AddressModel(self)
+        self.model.changed.connect(self.onModelChanged)
 
         self.octets = []
 
@@ -345,54 +673,49 @@ class IPv4(QtWidgets.QWidget):
         self.layout.addWidget(self.octets[3])
 
     def getIpAddress(self) -> []:
-        return [
-            self.octets[0].getValue(),
-            self.octets[1].getValue(),
-            self.octets[2].getValue(),
-            self.octets[3].getValue()
-        ]
+        return self.model.octets()
 
     def setIpAddress(self, ipAddress:[]):
-        for i in range(4):
-            self.octets[i].setValue(ipAddress[i])
+        self.model.setOctets(ipAddress)
 
     def getOctetValue(self, octetOrdinal:int) -> int:
-        return self.octets[octetOrdinal - 1].getValue()
+        return self.model.octet(octetOrdinal - 1)
 
     def setOctetValue(self, octetOrdinal: int, value:int):
-        self.octets[octetOrdinal - 1].setValue(value)
+        self.model.setOctet(octetOrdinal - 1, value)
 
     def onOctetValueChanged(self, octetIndex, value):
-        for h in self.octetChangedHandlers:
-            h(octetIndex + 1, value)
-
-    def addOctetValueChangedHandler(self, handler):
-        self.octetChangedHandlers.append(handler)
+        self.model.setOctet(octetIndex, value)
 
-    def removeOctetValueChangedHandler(self, handler):
-        self.octetChangedHandlers.remove(handler)
+    @instrument.timedSlot('IPv4.onModelChanged')
+    def onModelChanged(self, dirty:int):
+        # Only the changed octets are serialized, and an editor whose text
+        # already reads as the model value (the one being typed in) is left alone
+        for i in range(4):
+            if dirty >> i & 1:
+                value = self.model.octet(i)
+                if value != -1 and self.octets[i].getValue() != value:
+                    self.octets[i].setValue(value)
 
     def keyPressEvent(self, event):
-        if event.modifiers() == QtCore.Qt.KeyboardModifier.ControlModifier and event.key() == QtCore.Qt.Key.Key_V:
+        if isShortcut(event, QtCore.Qt.Key.Key_V):
             text = QtGui.QGuiApplication.clipboard().text()
-            parsedIp = core.parseIpAddress(text, self.binaryMode)
-            if len(parsedIp) == 4:
-                self.octets[0].setValue(parsedIp[0], True)
-                self.octets[1].setValue(parsedIp[1], True)
-                self.octets[2].setValue(parsedIp[2], True)
-                self.octets[3].setValue(parsedIp[3], True)
-        elif event.modifiers() == QtCore.Qt.KeyboardModifier.ControlModifier and event.key() == QtCore.Qt.Key.Key_C:
-            oct1 = core.serializeOctet(self.octets[0].getValue(), self.binaryMode)
-            oct2 = core.serializeOctet(self.octets[1].getValue(), self.binaryMode)
-            oct3 = core.serializeOctet(self.octets[2].getValue(), self.binaryMode)
-            oct4 = core.serializeOctet(self.octets[3].getValue(), self.binaryMode)
-
-            ip = [oct1, oct2, oct3, oct4]
-            text = '.'.join(ip)
-            QtGui.QGuiApplication.clipboard().setText(text)
+            parsedIp = codec.parseIpAddress(text, self.binaryMode)
+            if core.isValidIpAddress(parsedIp):
+                self.model.setOctets(parsedIp)
+        elif isShortcut(event, QtCore.Qt.Key.Key_C):
+            copyToClipboard(codec.serializeIpAddress(self.getIpAddress(), self.binaryMode))
         else:
             super().keyPressEvent(event)
 
+# Clipboard handling shared by the address editors and the results table
+
+def isShortcut(event, key) -> bool:
+    return event.modifiers() == QtCore.Qt.KeyboardModifier.ControlModifier and event.key() == key
+
+def copyToClipboard(text:str):
+    QtGui.QGuiApplication.clipboard().setText(text)
+
 def QLineEditAsShortSubnetMask():
     line = QtWidgets.QLineEdit()
 
@@ -409,7 +732,7 @@ class SubnetMask(QtWidgets.QWidget):
         super().__init__()
 
         self.fullMask = IPv4()
-        self.fullMask.addOctetValueChangedHandler(self.onOctetChanged)
+        self.fullMask.model.changed.connect(self.onMaskChanged)
 
         self.shortMask = QLineEditAsShortSubnetMask()
         self.shortMask.textEdited.connect(lambda: self.onShortMaskChanged(self.shortMask.text()[1:]))
@@ -421,17 +744,22 @@ class SubnetMask(QtWidgets.QWidget):
     def getMask(self) -> []:
         return self.fullMask.getIpAddress()
 
-    def onOctetChanged(self, octetOrdinal, octetValue):
-        if core.isValidSubnetMask(self.fullMask.getIpAddress()):
-            networkBits = core.networkBitsInSubnetMask(self.fullMask.getIpAddress())
-            self.shortMask.setText(str(networkBits))
-        else:
-            self.shortMask.setText(str(0))
+    @staticmethod
+    def maskFromShortMask(text:str) -> int:
+        # Packed mask a short form stands for, out of range lengths read as /0
+        text = text.strip()
+        prefix = int(text) if text.isascii() and text.isdigit() else 0
+        return core.PREFIX_MASKS[prefix] if prefix <= 32 else 0
+
+    def onMaskChanged(self, dirty:int):
+        # Once per tick however many octets changed, and only when the short
+        # form does not already describe the mask (it was just typed there)
+        model = self.fullMask.model
+        if model.value == self.maskFromShortMask(self.shortMask.text()[1:]) and model.isValid():
+            return
 
-    def onShortMaskChanged(self, mask):
-        subnetMask = core.calculateSubnetMaskFromShortMask(int(mask))
+        networkBits = core.prefixFromMask(model.value) if model.isValid() else -1
+        self.shortMask.setText(str(max(networkBits, 0)))
 
-        if len(subnetMask) == 0:
-            self.fullMask.setIpAddress([0, 0, 0, 0])
-        else:
-            self.fullMask.setIpAddress(subnetMask)
\ No newline at end of file
+    def onShortMaskChanged(self, mask):
+        self.fullMask.model.setValue(self.maskFromShortMask(mask))